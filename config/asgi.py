@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Serve the async dashboard views (see settings.ASYNC_DASHBOARDS)
+os.environ.setdefault('DJANGO_ASYNC_DASHBOARDS', '1')
 
 application = get_asgi_application()
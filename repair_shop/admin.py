@@ -124,6 +124,46 @@ class MyUserAdmin(admin.ModelAdmin):
         kwargs['form'] = form
         return super().get_form(request, obj, **kwargs)
 
+# ============================================
+# Repair Transaction Admin
+# ============================================
+class GadgetRepairTransactionAdminForm(forms.ModelForm):
+    """Admin form that reports a second active repair as a form error"""
+
+    class Meta:
+        model = GadgetRepairTransaction
+        fields = '__all__'
+
+    def clean(self):
+        # The model leaves one_active_repair_per_gadget to its unique index
+        # (see GadgetRepairTransaction.get_constraints), so check it here;
+        # admin edits are rare enough for the extra query.
+        cleaned_data = super().clean()
+        gadget = cleaned_data.get('gadget') or getattr(self.instance, 'gadget', None)
+        status = cleaned_data.get('status', self.instance.status)
+        active = (GadgetRepairTransaction.PENDING, GadgetRepairTransaction.INPROGRESS)
+        if gadget is not None and status in active:
+            others = GadgetRepairTransaction.objects.filter(gadget=gadget, status__in=active)
+            if self.instance.pk:
+                others = others.exclude(pk=self.instance.pk)
+            if others.exists():
+                raise forms.ValidationError(GadgetRepairTransaction.ACTIVE_REPAIR_ERROR)
+        return cleaned_data
+
+
+class GadgetRepairTransactionAdmin(admin.ModelAdmin):
+    form = GadgetRepairTransactionAdminForm
+    list_display = ('code', 'gadget', 'status', 'technician', 'brought_in_date')
+    list_filter = ('status',)
+    search_fields = ('code',)
+
+    def get_readonly_fields(self, request, obj=None):
+        """Status changes must go through transition() so they are checked and recorded"""
+        if obj is None:  # Adding: save() records the initial status event
+            return ('completed_at',)
+        return ('status', 'completed_at')
+
+
 # ============================================
 # Register Models
 # ============================================
@@ -131,4 +171,4 @@ admin.site.register(MyUser, MyUserAdmin)  # ✅ USE CUSTOM ADMIN
 admin.site.register(Customer)
 admin.site.register(Gadget)
 admin.site.register(GadgetRepairLog)
-admin.site.register(GadgetRepairTransaction)
+admin.site.register(GadgetRepairTransaction, GadgetRepairTransactionAdmin)
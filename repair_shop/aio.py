@@ -0,0 +1,61 @@
+"""
+Concurrent dashboard queries for the async views (served under ASGI).
+
+Django's async ORM (``acount()``, ``aaggregate()``, ...) runs every query
+through ``sync_to_async(thread_sensitive=True)``: all of them share one
+thread and one connection, so ``asyncio.gather`` over them still runs the
+queries one after another. To actually overlap them, ``gather_queries`` runs
+each query in its own worker thread, and so on its own connection, when
+``settings.DASHBOARD_CONCURRENT_QUERIES`` is on.
+
+That only pays off on a server database (PostgreSQL, MySQL), where every
+query spends most of its time waiting on the network and the server serves
+connections in parallel. SQLite is a local file with a single writer, and a
+test database's uncommitted rows are invisible to other connections, so the
+setting is off for SQLite and the queries run in one hop to the shared
+thread instead.
+
+Usage:
+    results = await gather_queries({
+        'pending': pending_qs.count,
+        'revenue': lambda: payments.aggregate(total=Sum('amount'))['total'],
+    })
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+
+def concurrent_queries():
+    return getattr(settings, 'DASHBOARD_CONCURRENT_QUERIES', False)
+
+
+def _on_worker_connection(query):
+    """Run ``query`` in a pool thread with the same connection lifecycle as a request."""
+    def run():
+        # Honours CONN_MAX_AGE / CONN_HEALTH_CHECKS for this thread's connection
+        close_old_connections()
+        try:
+            return query()
+        finally:
+            close_old_connections()
+    return run
+
+
+async def gather_queries(queries):
+    """
+    Run ``{name: zero-argument callable}`` and return ``{name: result}``.
+    The callables must be independent of each other; the replica routing
+    context (routers.replica_reads) is carried into every thread.
+    """
+    names = list(queries)
+    if not concurrent_queries():
+        return await sync_to_async(lambda: {name: queries[name]() for name in names})()
+
+    results = await asyncio.gather(*(
+        sync_to_async(_on_worker_connection(queries[name]), thread_sensitive=False)()
+        for name in names
+    ))
+    return dict(zip(names, results))
@@ -0,0 +1,315 @@
+"""
+Read-only JSON API for integrations (accounting exports, the customer kiosk).
+
+Every resource maps public field names to ORM lookups and pages are read
+straight from ``.values()``, so a response is a list of dicts built by the
+database driver — no model instances, no per-row property queries. Repair
+balances come from the same ``with_balances()`` subqueries as the reports
+and are only joined in when a balance field or the payment filter asks for
+them.
+
+Query parameters (all resources):
+    fields=id,code,status   project a subset of the resource's fields
+    limit=50                page size (max ``MAX_LIMIT``)
+    cursor=...              opaque token from the previous page's ``next``
+
+plus the same filters as the matching HTML list view (``search``,
+``status``, ``payment``, ``date_from``/``date_to``, ``month``/``year``, ...).
+
+Pages are keyset-paginated on the primary key, newest first: the cursor is
+the last id served, so deep pages cost the same as the first one and rows
+inserted while a client is paging never shift or repeat.
+"""
+import base64
+import datetime
+
+from django.db.models import F, Q
+
+from .models import Customer, Gadget, GadgetRepairTransaction, GadgetTransactionReceipt, Payment
+
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+# Annotations added by GadgetRepairTransactionQuerySet.with_balances()
+BALANCE_LOOKUPS = {'logs_total', 'payments_total', 'outstanding'}
+
+
+class ApiError(ValueError):
+    """A bad query parameter; the view answers 400 with the message."""
+
+
+def _date_param(params, name):
+    value = params.get(name, '').strip()
+    if not value:
+        return None
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise ApiError(f'{name} must be a date in YYYY-MM-DD format')
+
+
+def _int_param(params, name):
+    value = params.get(name, '').strip()
+    if not value:
+        return None
+    if not value.isdigit():
+        raise ApiError(f'{name} must be a positive integer')
+    return int(value)
+
+
+def _search(*lookups):
+    """Filter for ``?search=``: any of ``lookups`` contains the term."""
+    def apply(queryset, params):
+        term = params.get('search', '').strip()
+        if not term:
+            return queryset
+        query = Q()
+        for lookup in lookups:
+            query |= Q(**{f'{lookup}__icontains': term})
+        return queryset.filter(query)
+    return apply
+
+
+def _date_range(field):
+    """Filter for ``?date_from=&date_to=`` (inclusive local dates) on ``field``."""
+    def apply(queryset, params):
+        date_from = _date_param(params, 'date_from')
+        date_to = _date_param(params, 'date_to')
+        if date_from:
+            queryset = queryset.filter(**{f'{field}__date__gte': date_from})
+        if date_to:
+            queryset = queryset.filter(**{f'{field}__date__lte': date_to})
+        return queryset
+    return apply
+
+
+def _exact(name, lookup, choices=None):
+    """Filter for ``?<name>=value`` on ``lookup``: one of ``choices``, or an id when there are none."""
+    def apply(queryset, params):
+        value = params.get(name, '').strip()
+        if not value:
+            return queryset
+        if choices is None:
+            value = _int_param(params, name)
+        elif value not in choices:
+            raise ApiError(f'{name} must be one of: {", ".join(choices)}')
+        return queryset.filter(**{lookup: value})
+    return apply
+
+
+def _repair_month_year(queryset, params):
+    # Same as the repair list: non-numeric month/year are ignored
+    month = params.get('month', '').strip()
+    year = params.get('year', '').strip()
+    if month.isdigit():
+        queryset = queryset.filter(brought_in_date__month=int(month))
+    if year.isdigit():
+        queryset = queryset.filter(brought_in_date__year=int(year))
+    return queryset
+
+
+def _repair_payment(queryset, params):
+    """?payment=paid|unpaid, in SQL — paid means priced and nothing outstanding (is_fully_paid)."""
+    value = params.get('payment', '').strip()
+    if not value:
+        return queryset
+    if value not in ('paid', 'unpaid'):
+        raise ApiError('payment must be one of: paid, unpaid')
+    paid = Q(logs_total__isnull=False, outstanding__lte=0)
+    return queryset.filter(paid if value == 'paid' else ~paid)
+
+
+class ApiResource:
+    """
+    One API collection.
+
+    ``fields`` maps public names to ORM lookups (a name equal to its lookup
+    is selected as-is, others are aliased with ``F()``); ``filters`` are
+    ``(queryset, params) -> queryset`` callables applied in order.
+    """
+
+    def __init__(self, name, model, fields, filters=(), balances=False):
+        self.name = name
+        self.model = model
+        self.fields = fields
+        self.filters = filters
+        # Whether the queryset supports with_balances()
+        self.balances = balances
+
+    @property
+    def permission(self):
+        return f'{self.model._meta.app_label}.view_{self.model._meta.model_name}'
+
+    def projection(self, params):
+        """The requested public field names, in request order."""
+        requested = params.get('fields', '').strip()
+        if not requested:
+            return list(self.fields)
+        names = list(dict.fromkeys(name.strip() for name in requested.split(',') if name.strip()))
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise ApiError(f'Unknown field(s) for {self.name}: {", ".join(unknown)}. '
+                           f'Available: {", ".join(self.fields)}')
+        return names
+
+    def queryset(self, params, names):
+        queryset = self.model.objects.all()
+        if self.balances and (
+            params.get('payment') or any(self.fields[name] in BALANCE_LOOKUPS for name in names)
+        ):
+            queryset = queryset.with_balances()
+        for apply in self.filters:
+            queryset = apply(queryset, params)
+        return queryset
+
+    def page(self, params):
+        """
+        Return ``(rows, next_cursor)`` for one page; ``next_cursor`` is None
+        on the last page.
+        """
+        names = self.projection(params)
+        limit = _int_param(params, 'limit') or DEFAULT_LIMIT
+        limit = min(limit, MAX_LIMIT)
+
+        queryset = self.queryset(params, names).order_by('-pk')
+        cursor = params.get('cursor', '').strip()
+        if cursor:
+            queryset = queryset.filter(pk__lt=decode_cursor(cursor))
+
+        plain = [name for name in names if self.fields[name] == name]
+        aliased = {name: F(self.fields[name]) for name in names if self.fields[name] != name}
+        # The pk drives the cursor even when the client didn't ask for it
+        rows = list(queryset.values('pk', *plain, **aliased)[:limit + 1])
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]['pk'])
+        # Keep the client's field order and drop the helper pk
+        return [{name: row[name] for name in names} for row in rows], next_cursor
+
+
+def encode_cursor(pk):
+    return base64.urlsafe_b64encode(str(pk).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        value = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        return int(value)
+    except (ValueError, UnicodeDecodeError):
+        raise ApiError('Invalid cursor')
+
+
+RESOURCES = {
+    resource.name: resource for resource in (
+        ApiResource(
+            'customers', Customer,
+            fields={
+                'id': 'id',
+                'first_name': 'first_name',
+                'last_name': 'last_name',
+                'email': 'email',
+                'phone_number': 'phone_number',
+                'address': 'address',
+                'id_type': 'id_type',
+                'id_number': 'id_number',
+                'created_at': 'created_at',
+                'updated_at': 'updated_at',
+            },
+            filters=[
+                _search('first_name', 'last_name', 'email', 'phone_number'),
+            ],
+        ),
+        ApiResource(
+            'gadgets', Gadget,
+            fields={
+                'id': 'id',
+                'customer_id': 'customer_id',
+                'customer_first_name': 'customer__first_name',
+                'customer_last_name': 'customer__last_name',
+                'gadget_type': 'gadget_type',
+                'gadget_brand': 'gadget_brand',
+                'gadget_model': 'gadget_model',
+                'imei_number': 'imei_number',
+                'serial_number': 'serial_number',
+                'created_at': 'created_at',
+                'updated_at': 'updated_at',
+            },
+            filters=[
+                _search('gadget_brand', 'gadget_model', 'imei_number',
+                        'customer__first_name', 'customer__last_name'),
+                _exact('customer', 'customer_id'),
+            ],
+        ),
+        ApiResource(
+            'repairs', GadgetRepairTransaction,
+            fields={
+                'id': 'id',
+                'code': 'code',
+                'status': 'status',
+                'gadget_id': 'gadget_id',
+                'customer_id': 'gadget__customer_id',
+                'technician_id': 'technician_id',
+                'technician_username': 'technician__username',
+                'brought_in_date': 'brought_in_date',
+                'completed_at': 'completed_at',
+                # total_cost is null until a price has been quoted
+                'total_cost': 'logs_total',
+                'total_paid': 'payments_total',
+                'total_due': 'outstanding',
+                'created_at': 'created_at',
+                'updated_at': 'updated_at',
+            },
+            filters=[
+                _repair_month_year,
+                _search('code', 'gadget__gadget_brand', 'gadget__gadget_model',
+                        'technician__username', 'gadget__customer__first_name'),
+                _exact('status', 'status', [value for value, _label in GadgetRepairTransaction.STATUS_CHOICES]),
+                _date_range('brought_in_date'),
+                _repair_payment,
+                _exact('gadget', 'gadget_id'),
+                _exact('technician', 'technician_id'),
+            ],
+            balances=True,
+        ),
+        ApiResource(
+            'payments', Payment,
+            fields={
+                'id': 'id',
+                'transaction_id': 'transaction_id',
+                'transaction_code': 'transaction__code',
+                'payment_type': 'payment_type',
+                'amount': 'amount',
+                'mobile_provider': 'mobile_provider',
+                'mobile_number': 'mobile_number',
+                'notes': 'notes',
+                'recorded_by_id': 'recorded_by_id',
+                'created_at': 'created_at',
+            },
+            filters=[
+                _exact('payment_type', 'payment_type', [value for value, _label in Payment.PAYMENT_TYPE_CHOICES]),
+                _exact('transaction', 'transaction_id'),
+                _date_range('created_at'),
+            ],
+        ),
+        ApiResource(
+            'receipts', GadgetTransactionReceipt,
+            fields={
+                'id': 'id',
+                'receipt_number': 'receipt_number',
+                'transaction_id': 'transaction_id',
+                'transaction_code': 'transaction__code',
+                'amount_paid': 'amount_paid',
+                'issued_date': 'issued_date',
+            },
+            filters=[
+                _search('receipt_number', 'transaction__code',
+                        'transaction__gadget__customer__first_name', 'transaction__gadget__gadget_brand'),
+                _exact('transaction', 'transaction_id'),
+                _date_range('issued_date'),
+            ],
+        ),
+    )
+}
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class RepairShopConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'repair_shop'
+
+    def ready(self):
+        from . import signals  # noqa: F401  (connects signal receivers)
@@ -0,0 +1,59 @@
+"""
+Authentication backend that serves the logged-in user from the cache.
+
+AuthenticationMiddleware calls ``get_user()`` on every request. Instead of a
+``MyUser`` query, CachedUserBackend keeps a compact snapshot per user (the
+fields in SNAPSHOT_FIELDS plus the session auth hash) and rebuilds the user
+from it. Fields outside the snapshot (password, last_login, ...) are
+deferred: they load on first access, as with ``.only()``.
+
+Snapshots are deleted on every MyUser save/delete (see signals.py), which
+covers profile edits, deactivation and password changes. Queryset
+``update()`` calls skip signals, so they must call invalidate_user_snapshot()
+themselves. With several workers, use a shared cache (CACHE_URL), or a write
+in one worker leaves the others serving the old snapshot until it expires.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from .models import MyUser
+
+
+USER_SNAPSHOT_KEY = 'repair_shop:user:{}'
+
+# Everything request.user is routinely asked for: names and the role flags
+SNAPSHOT_FIELDS = (
+    'id', 'username', 'email', 'first_name', 'last_name',
+    'is_active', 'is_admin', 'is_staff', 'is_superuser', 'is_technician', 'is_secretary',
+)
+
+
+def _timeout():
+    return getattr(settings, 'USER_SNAPSHOT_TIMEOUT', 60 * 15)
+
+
+def invalidate_user_snapshot(user_id):
+    cache.delete(USER_SNAPSHOT_KEY.format(user_id))
+
+
+class CachedUserBackend(ModelBackend):
+    """ModelBackend whose get_user() reads a cached snapshot before the database."""
+
+    def get_user(self, user_id):
+        key = USER_SNAPSHOT_KEY.format(user_id)
+        snapshot = cache.get(key)
+        if snapshot is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, {
+                    'fields': {name: getattr(user, name) for name in SNAPSHOT_FIELDS},
+                    'session_hash': user.get_session_auth_hash(),
+                }, _timeout())
+            return user
+
+        fields = snapshot['fields']
+        user = MyUser.from_db(DEFAULT_DB_ALIAS, list(fields), list(fields.values()))
+        user._session_auth_hash = snapshot['session_hash']
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,149 @@
+"""
+Versioned widget cache for the dashboards.
+
+Every tracked model has a generation counter stored in the cache. Signals
+bump the counter on save/delete (see signals.py), and widget keys embed the
+current generation of each model they depend on, so a write makes every
+dependent widget key unreachable at once — no explicit deletes needed, and
+nothing is served stale between writes.
+
+Usage:
+    stats = cached_widget('admin_stats', ['gadgetrepairtransaction', 'payment'],
+                          build_stats, year, month)
+
+The public repair-status lookup is cached per repair code instead, and those
+entries are deleted exactly (see invalidate_repair_status), so a write to one
+repair never evicts the hot entries of the others.
+"""
+import hashlib
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from .routers import primary_reads
+
+
+GENERATION_KEY = 'repair_shop:gen:{}'
+WIDGET_KEY = 'repair_shop:widget:{}:{}'
+REPAIR_STATUS_KEY = 'repair_shop:status:{}'
+RATE_KEY = 'repair_shop:rate:{}:{}:{}'
+
+
+def _timeout():
+    return getattr(settings, 'WIDGET_CACHE_TIMEOUT', 60 * 60)
+
+
+def _model_name(model):
+    return model if isinstance(model, str) else model._meta.model_name
+
+
+def bump_generation(model):
+    """Invalidate every widget that depends on ``model``."""
+    key = GENERATION_KEY.format(_model_name(model))
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Missing (first write or evicted): restart from the clock so a new
+        # generation can never collide with keys built from an older one.
+        cache.set(key, time.time_ns(), None)
+
+
+def generations(models):
+    """Return the current generation for each model name, creating missing ones."""
+    names = [_model_name(m) for m in models]
+    keys = {GENERATION_KEY.format(name): name for name in names}
+    found = cache.get_many(keys.keys())
+    result = {}
+    for key, name in keys.items():
+        if key not in found:
+            cache.add(key, time.time_ns(), None)
+            found[key] = cache.get(key)
+        result[name] = found[key]
+    return result
+
+
+def widget_key(name, models, *parts):
+    """Cache key for widget ``name`` at the current generation of ``models``."""
+    gens = generations(models)
+    version = '.'.join(f'{model}{gens[model]}' for model in sorted(gens))
+    vary = ':'.join(str(p) for p in parts)
+    # Hashed so keys stay short (memcached-safe) however many models are tracked
+    return WIDGET_KEY.format(name, hashlib.md5(f'{vary}|{version}'.encode()).hexdigest())
+
+
+def cached_widget(name, models, builder, *parts, timeout=None):
+    """Return the cached result of ``builder()``, rebuilding it after any write to ``models``."""
+    key = widget_key(name, models, *parts)
+    value = cache.get(key)
+    if value is None:
+        # Built from the primary: a lagging replica would be cached as current
+        with primary_reads():
+            value = builder()
+        cache.set(key, value, _timeout() if timeout is None else timeout)
+    return value
+
+
+async def acached_widget(name, models, builder, *parts, timeout=None):
+    """cached_widget for async views: ``builder`` is a coroutine function."""
+    key = await sync_to_async(widget_key)(name, models, *parts)
+    value = await cache.aget(key)
+    if value is None:
+        with primary_reads():
+            value = await builder()
+        await cache.aset(key, value, _timeout() if timeout is None else timeout)
+    return value
+
+
+def repair_status_key(code):
+    # Codes are customer-typed: normalise, and hash so any input is a safe key
+    return REPAIR_STATUS_KEY.format(hashlib.md5(code.strip().upper().encode()).hexdigest())
+
+
+def cached_repair_status(code, builder):
+    """
+    Return the public status entry for ``code``, calling ``builder(code)`` on
+    a miss. Unknown codes are cached too (as an empty dict), so guessing
+    doesn't reach the database either.
+    """
+    key = repair_status_key(code)
+    value = cache.get(key)
+    if value is None:
+        with primary_reads():
+            value = builder(code) or {}
+        cache.set(key, value, getattr(settings, 'REPAIR_STATUS_CACHE_TIMEOUT', 30))
+    return value
+
+
+def invalidate_repair_status(*codes):
+    """Drop the cached status entries of the repairs with these codes."""
+    cache.delete_many([repair_status_key(code) for code in codes if code])
+
+
+def _rate_key(scope, ident, window):
+    slot = int(time.time() // window)
+    return RATE_KEY.format(scope, hashlib.md5(str(ident).encode()).hexdigest(), slot)
+
+
+def rate_limit_reached(scope, ident, limit, window):
+    """True if ``ident`` already has ``limit`` hits in the current slot; counts nothing."""
+    return (cache.get(_rate_key(scope, ident, window)) or 0) >= limit
+
+
+def rate_limited(scope, ident, limit, window):
+    """
+    Count a hit for ``ident`` (e.g. a client IP) and return True once it has
+    made more than ``limit`` hits in the current ``window``-second slot.
+    Fixed windows: one cache add and one incr per hit, shared by all workers
+    when the cache is.
+    """
+    key = _rate_key(scope, ident, window)
+    cache.add(key, 0, window)
+    try:
+        hits = cache.incr(key)
+    except ValueError:
+        # Evicted between add and incr: start the slot again
+        cache.set(key, 1, window)
+        hits = 1
+    return hits > limit
@@ -0,0 +1,75 @@
+"""
+SQLite connection tuning.
+
+Stock SQLite uses a rollback journal, so one writer blocks every reader and
+concurrent writers fail straight away with "database is locked". Every new
+SQLite connection gets ``DEFAULT_SQLITE_PRAGMAS`` applied, or
+``settings.SQLITE_PRAGMAS`` when a project defines it (see signals.py):
+
+    journal_mode=WAL       readers no longer block the writer (or vice versa)
+    busy_timeout=<ms>      writers wait for the lock instead of failing at once
+    synchronous=NORMAL     fsync at checkpoints only; safe with WAL
+    cache_size=-<KiB>      per-connection page cache (negative = KiB)
+    mmap_size=<bytes>      memory-map the file for cheaper reads
+    temp_store=MEMORY      sorts/temp tables for GROUP BY stay in RAM
+
+Set ``SQLITE_PRAGMAS = {}`` to keep SQLite's defaults.
+"""
+import sqlite3
+
+from django.conf import settings
+from django.db import connections
+
+
+DEFAULT_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'busy_timeout': 5000,              # ms
+    'synchronous': 'NORMAL',
+    'cache_size': -20000,              # negative = KiB (~20 MB)
+    'mmap_size': 128 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+
+def sqlite_pragmas():
+    """The pragmas to apply, in order (journal_mode first: it needs no open transaction)."""
+    return getattr(settings, 'SQLITE_PRAGMAS', DEFAULT_SQLITE_PRAGMAS)
+
+
+def apply_pragmas(cursor, pragmas):
+    """Run ``PRAGMA name=value`` for each entry on a DB-API cursor."""
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name}={value}')
+
+
+def configure_sqlite_connection(connection):
+    """Apply the configured pragmas to a freshly opened Django connection."""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = sqlite_pragmas()
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor, pragmas)
+
+
+def sync_sqlite_replica(source, replica):
+    """
+    Copy the SQLite database behind alias ``source`` onto alias ``replica``.
+
+    Uses the sqlite3 online backup API, so the primary stays writable while
+    it copies. Meant for running a local replica (e.g. every few seconds from
+    cron via ``manage.py sync_replica``); real deployments use their
+    database's own replication instead.
+    """
+    source_conn, replica_conn = connections[source], connections[replica]
+    if source_conn.vendor != 'sqlite' or replica_conn.vendor != 'sqlite':
+        raise ValueError('sync_sqlite_replica only copies between SQLite databases')
+    # Release the replica's handle so the copy isn't blocked by an open read
+    replica_conn.close()
+    source_conn.ensure_connection()
+    target = sqlite3.connect(replica_conn.settings_dict['NAME'])
+    try:
+        source_conn.connection.backup(target)
+    finally:
+        target.close()
@@ -1,7 +1,20 @@
+import asyncio
+import hashlib
+import os
 from functools import wraps
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.views import redirect_to_login
 from django.shortcuts import redirect
 from django.contrib import messages
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+from .routers import is_pinned, iterate_on_replica, replica_alias, replica_reads
 
 
 def permission_required_or_superuser(perm):
@@ -38,3 +51,129 @@ def permission_required_or_superuser(perm):
         return wrapper
     return decorator
 
+
+def async_login_required(view_func):
+    """
+    login_required for async views (Django 4.2's decorator only wraps sync ones).
+
+    Usage:
+        @async_login_required
+        async def admin_dashboard_panel_async(request, panel):
+            ...
+    """
+    @wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        # Resolving the lazy request.user may read the session and user tables
+        if not await sync_to_async(lambda: request.user.is_authenticated)():
+            return redirect_to_login(request.get_full_path())
+        return await view_func(request, *args, **kwargs)
+
+    return wrapper
+
+
+def use_replica(view_func):
+    """
+    Decorator to serve a read-only view from the read replica.
+
+    Only GET/HEAD requests are routed, and sessions that wrote recently stay
+    on the primary (see routers.py). Put it below the permission decorator so
+    the session and user are still loaded from the primary. Works on async
+    views too.
+
+    Usage:
+        @permission_required_or_superuser('repair_shop.view_customer')
+        @use_replica
+        def customer_list(request):
+            ...
+    """
+    if asyncio.iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            if (request.method not in ('GET', 'HEAD') or replica_alias() is None
+                    or await sync_to_async(is_pinned)(request)):
+                return await view_func(request, *args, **kwargs)
+            with replica_reads():
+                return await view_func(request, *args, **kwargs)
+
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or replica_alias() is None or is_pinned(request):
+            return view_func(request, *args, **kwargs)
+
+        with replica_reads():
+            response = view_func(request, *args, **kwargs)
+        if isinstance(response, StreamingHttpResponse):
+            # CSV exports run their queries while the response is streamed
+            response.streaming_content = iterate_on_replica(response.streaming_content)
+        return response
+
+    return wrapper
+
+
+TEMPLATE_DIR = Path(__file__).resolve().parent / 'templates'
+_template_version = None
+
+
+def template_version():
+    """Newest template mtime, so a deploy that changes templates changes every ETag."""
+    global _template_version
+    if _template_version is None or settings.DEBUG:
+        _template_version = max(
+            (os.stat(os.path.join(root, name)).st_mtime_ns
+             for root, _dirs, files in os.walk(TEMPLATE_DIR) for name in files),
+            default=0,
+        )
+    return _template_version
+
+
+def conditional_page(page_state):
+    """
+    Decorator to answer GET/HEAD with 304 Not Modified when nothing the page
+    shows has changed since the browser's copy.
+
+    ``page_state(request, *args, **kwargs)`` returns a dict describing the
+    page's data (updated_at maxima, row counts, ...) from one cheap query, or
+    None to skip (e.g. the object is missing, so the view can 404). The ETag
+    hashes that dict with the user's identity and roles and the template
+    version. No Last-Modified is sent: a deleted row lowers a count without
+    moving any timestamp, so If-Modified-Since alone would answer 304 with a
+    stale page. Requests with pending flash messages always render, so the
+    messages are shown.
+
+    Put it below the permission decorator so access is checked first.
+
+    Usage:
+        @permission_required_or_superuser('repair_shop.view_customer')
+        @conditional_page(customer_page_state)
+        def customer_detail(request, customer_id):
+            ...
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or len(messages.get_messages(request)):
+                return view_func(request, *args, **kwargs)
+            state = page_state(request, *args, **kwargs)
+            if state is None:
+                return view_func(request, *args, **kwargs)
+
+            user = request.user
+            identity = (user.pk, user.is_superuser, user.is_admin, user.is_staff,
+                        user.is_technician, user.is_secretary)
+            fingerprint = repr((sorted(state.items()), identity, template_version()))
+            etag = quote_etag(hashlib.md5(fingerprint.encode()).hexdigest())
+
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = view_func(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            response['ETag'] = etag
+            # Per-user page: never shared, always revalidated
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+
+        return wrapper
+    return decorator
@@ -1,4 +1,5 @@
 from pyexpat import model
+import uuid
 from django import forms
 from .models import Customer, Gadget, GadgetRepairTransaction, GadgetRepairLog, GadgetTransactionReceipt, MyUser, Payment
 from django.forms import ModelForm
@@ -468,17 +469,8 @@ class GadgetRepairTransactionForm(ModelForm):
                 _("The selected gadget does not belong to the selected customer.")
             )
         
-        # Only check for active repairs when CREATING a new repair (not when editing)
-        # self.instance.pk is None when creating, has a value when editing
-        if self.instance.pk is None:  # Only for new repairs
-            active_repairs = GadgetRepairTransaction.objects.filter(
-                gadget=gadget,
-                status__in=['Pending', 'In Progress']
-            )
-            if active_repairs.exists():
-                raise forms.ValidationError(
-                    "This gadget already has an active repair."
-                )
+        # A second active repair for the gadget is rejected by the database
+        # (one_active_repair_per_gadget); the view shows it as a form error.
         
         return cleaned_data
 
@@ -593,6 +585,9 @@ class GadgetTransactionReceiptForm(ModelForm):
 class PaymentForm(ModelForm):
     """Form for recording a payment (cash or mobile money) against a repair."""
 
+    # One token per rendered form; a double submit or resubmitted POST reuses it
+    idempotency_key = forms.CharField(widget=forms.HiddenInput, required=False, max_length=64)
+
     class Meta:
         model = Payment
         fields = ['payment_type', 'amount', 'mobile_provider', 'mobile_number', 'notes']
@@ -631,6 +626,11 @@ class PaymentForm(ModelForm):
             }),
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not self.is_bound:
+            self.initial.setdefault('idempotency_key', uuid.uuid4().hex)
+
     def clean_amount(self):
         amount = self.cleaned_data.get('amount')
         if amount is not None and amount <= 0:
@@ -645,3 +645,26 @@ class PaymentForm(ModelForm):
             self.add_error('mobile_number', _("Mobile number is required for Mobile Money payments."))
         return cleaned_data
     
+
+
+class StatementUploadForm(forms.Form):
+    """Upload a mobile-money provider statement (CSV) for matching against payments."""
+    statement = forms.FileField(
+        label=_('Provider Statement (CSV)'),
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv,text/csv'}),
+    )
+    provider = forms.CharField(
+        label=_('Mobile Provider (optional)'),
+        required=False,
+        widget=forms.TextInput(attrs={
+            'class': 'form-control',
+            'placeholder': 'e.g. Africell, QMoney, Wave',
+        }),
+    )
+    window_minutes = forms.IntegerField(
+        label=_('Time Window (minutes)'),
+        initial=60,
+        min_value=1,
+        max_value=24 * 60,
+        widget=forms.NumberInput(attrs={'class': 'form-control'}),
+    )
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from repair_shop.models import GadgetRepairTransaction
+from repair_shop.service import ArchiveService
+
+
+class Command(BaseCommand):
+    help = 'Move closed repairs (with logs, payments and receipts) to the archive tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, default=None,
+                            help='Age in days since the repair was last updated (default settings.ARCHIVE_AFTER_DAYS)')
+        parser.add_argument('--batch-size', type=int, default=500, help='Repairs moved per transaction (default 500)')
+
+    def handle(self, *args, **options):
+        result = ArchiveService.archive_closed_repairs(
+            older_than_days=options['older_than'], batch_size=options['batch_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"✓ {result['message']}"))
+        self.stdout.write(f'{GadgetRepairTransaction.objects.count()} repair(s) remain in the live tables')
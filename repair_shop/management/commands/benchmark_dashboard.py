@@ -0,0 +1,106 @@
+import asyncio
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from repair_shop import views
+from repair_shop.models import Customer, Gadget, GadgetRepairLog, GadgetRepairTransaction, Payment
+
+
+class Command(BaseCommand):
+    help = ('Compare wall-clock time of the admin stats panel queries run one after another '
+            '(sync view) and issued concurrently (async view). Runs against a throwaway test database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=20, help='Timed runs per mode (default 20)')
+        parser.add_argument('--repairs', type=int, default=2000, help='Repairs seeded (default 2000)')
+        parser.add_argument('--latency-ms', type=float, default=0.0,
+                            help='Delay added to every query, to model a database across the network '
+                                 '(default 0: a local SQLite file gains nothing from concurrency)')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        latency = options['latency_ms'] / 1000
+
+        def delay(execute, sql, params, many, context):
+            time.sleep(latency)
+            return execute(sql, params, many, context)
+
+        def add_delay(sender, connection, **kwargs):
+            connection.execute_wrappers.append(delay)
+
+        if latency:
+            # Worker threads open their own connections, so hook every new one
+            connection.ensure_connection()
+            connection.execute_wrappers.append(delay)
+            connection_created.connect(add_delay)
+        try:
+            self._seed(options['repairs'])
+            now = timezone.now()
+            queries = len(views._admin_stats_queries(now.month, now.year))
+            self.stdout.write(
+                f"{queries} stat queries, {options['repairs']} repairs, "
+                f"{options['latency_ms']:g} ms added per query, {options['rounds']} rounds"
+            )
+            runs = [
+                ('sync', lambda: views._admin_stats_panel(now, now.month, now.year), None),
+                ('async', lambda: asyncio.run(views._admin_stats_panel_async(now, now.month, now.year)), False),
+                ('async + concurrent', lambda: asyncio.run(views._admin_stats_panel_async(now, now.month, now.year)), True),
+            ]
+            for label, run, concurrent in runs:
+                timings = self.measure(run, options['rounds'], concurrent)
+                self.stdout.write(
+                    f"{label:>20}: median {statistics.median(timings):8.1f} ms  "
+                    f"min {min(timings):8.1f} ms  max {max(timings):8.1f} ms"
+                )
+        finally:
+            connection_created.disconnect(add_delay)
+            connection.execute_wrappers[:] = [w for w in connection.execute_wrappers if w is not delay]
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def measure(self, run, rounds, concurrent=None):
+        """Time ``run`` ``rounds`` times (after one warm-up) and return the timings in ms."""
+        settings = {} if concurrent is None else {'DASHBOARD_CONCURRENT_QUERIES': concurrent}
+        with override_settings(REPLICA_DATABASE=None, **settings):
+            run()
+            timings = []
+            for _ in range(rounds):
+                started = time.perf_counter()
+                run()
+                timings.append((time.perf_counter() - started) * 1000)
+        return timings
+
+    def _seed(self, repairs):
+        customers = Customer.objects.bulk_create(
+            Customer(first_name='Bench', last_name=str(n)) for n in range(max(repairs // 4, 1))
+        )
+        gadgets = Gadget.objects.bulk_create(
+            Gadget(customer=customers[n % len(customers)], gadget_brand='Samsung', gadget_model='A14')
+            for n in range(repairs)
+        )
+        statuses = [GadgetRepairTransaction.PENDING, GadgetRepairTransaction.INPROGRESS,
+                    GadgetRepairTransaction.COMPLETED, GadgetRepairTransaction.COMPLETED]
+        now = timezone.now()
+        transactions = GadgetRepairTransaction.objects.bulk_create(
+            GadgetRepairTransaction(
+                gadget=gadget, status=statuses[n % len(statuses)], code=f'BENCH{n:06d}',
+                completed_at=now if statuses[n % len(statuses)] == GadgetRepairTransaction.COMPLETED else None,
+            )
+            for n, gadget in enumerate(gadgets)
+        )
+        GadgetRepairLog.objects.bulk_create(
+            GadgetRepairLog(transaction=t, repair_cost=Decimal('100'), issue_description='Screen')
+            for t in transactions
+        )
+        Payment.objects.bulk_create(
+            Payment(transaction=t, amount=Decimal('60'))
+            for t in transactions if t.status == GadgetRepairTransaction.COMPLETED
+        )
@@ -0,0 +1,85 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext, override_settings, setup_test_environment, teardown_test_environment,
+)
+from django.urls import reverse
+
+from repair_shop.models import Customer, Gadget, MyUser
+
+
+# (label, SESSION_ENGINE, MESSAGE_STORAGE); the first row is Django's default setup
+RUNS = [
+    ('db + fallback messages', 'django.contrib.sessions.backends.db',
+     'django.contrib.messages.storage.fallback.FallbackStorage'),
+    ('db + cookie messages', 'django.contrib.sessions.backends.db',
+     'django.contrib.messages.storage.cookie.CookieStorage'),
+    ('cached_db', 'django.contrib.sessions.backends.cached_db',
+     'django.contrib.messages.storage.cookie.CookieStorage'),
+    ('signed_cookies', 'django.contrib.sessions.backends.signed_cookies',
+     'django.contrib.messages.storage.cookie.CookieStorage'),
+]
+
+USERNAME, PASSWORD = 'session_bench', 'session-bench-pass'
+
+
+class Command(BaseCommand):
+    help = ('Count django_session reads/writes for a typical intake workflow '
+            '(log in, add customer, add gadget, open dashboard) under each session store. '
+            'Runs against a throwaway test database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=10, help='Intake workflows per run (default 10)')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            MyUser.objects.create_superuser(
+                username=USERNAME, password=PASSWORD, email='bench@example.com', first_name='Bench',
+            )
+            self.stdout.write(f"{options['rounds']} intake workflows per run")
+            for run, (label, engine, storage) in enumerate(RUNS):
+                result = self.measure(engine, storage, options['rounds'], tag=f'run{run}')
+                self.stdout.write(
+                    f"{label:>24}: {result['requests']:4d} requests  "
+                    f"{result['reads']:4d} session reads  {result['writes']:4d} session writes"
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def measure(self, engine, storage, rounds, tag='run'):
+        """Run the workflow ``rounds`` times and count the queries on django_session."""
+        with override_settings(SESSION_ENGINE=engine, MESSAGE_STORAGE=storage, REPLICA_DATABASE=None):
+            client = Client()
+            requests = 0
+            with CaptureQueriesContext(connection) as queries:
+                client.login(username=USERNAME, password=PASSWORD)
+                for n in range(rounds):
+                    requests += self._intake(client, f'{tag}-{n}')
+        session_queries = [q['sql'] for q in queries if '"django_session"' in q['sql']]
+        reads = sum(1 for sql in session_queries if sql.lstrip().upper().startswith('SELECT'))
+        return {'requests': requests + 1, 'reads': reads, 'writes': len(session_queries) - reads}
+
+    def _intake(self, client, tag):
+        """Walk-in customer brings a phone in; returns the number of requests made."""
+        responses = [
+            client.get(reverse('repair_shop:create_customer')),
+            client.post(reverse('repair_shop:create_customer'), {
+                'first_name': 'Walkin', 'last_name': tag, 'email': f'{tag}@example.com',
+                'phone_number': '7000000', 'address': 'Banjul', 'id_number': tag, 'id_type': 'NI',
+            }, follow=True),
+        ]
+        customer = Customer.objects.get(last_name=tag)
+        responses += [
+            client.get(reverse('repair_shop:create_gadget')),
+            client.post(reverse('repair_shop:create_gadget'), {
+                'customer': customer.id, 'gadget_type': Gadget.SMARTPHONE,
+                'gadget_brand': 'Samsung', 'gadget_model': 'A14', 'imei_number': tag,
+            }, follow=True),
+            client.get(reverse('repair_shop:home'), follow=True),
+        ]
+        # follow=True adds the redirected-to page as a second request
+        return sum(1 + len(getattr(response, 'redirect_chain', ())) for response in responses)
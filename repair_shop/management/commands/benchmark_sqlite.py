@@ -0,0 +1,109 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+
+from repair_shop.db import apply_pragmas, sqlite_pragmas
+
+
+SCHEMA = """
+CREATE TABLE payment (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    transaction_id INTEGER NOT NULL,
+    amount DECIMAL NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX payment_transaction_idx ON payment (transaction_id);
+"""
+
+
+class Command(BaseCommand):
+    help = ('Measure SQLite read/write throughput with several worker threads, '
+            'with stock settings and with the configured pragmas (repair_shop/db.py)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4, help='Reader threads (default 4)')
+        parser.add_argument('--writers', type=int, default=4, help='Writer threads (default 4)')
+        parser.add_argument('--seconds', type=float, default=5.0, help='Duration of each run (default 5)')
+        parser.add_argument('--rows', type=int, default=20000, help='Rows seeded before each run (default 20000)')
+
+    def handle(self, *args, **options):
+        runs = [('stock', {}), ('tuned', sqlite_pragmas())]
+        self.stdout.write(
+            f"{options['readers']} readers, {options['writers']} writers, "
+            f"{options['seconds']:g}s per run, {options['rows']} seeded rows"
+        )
+        for label, pragmas in runs:
+            result = self._run(pragmas, **options)
+            self.stdout.write(
+                f"{label:>6}: {result['reads'] / result['elapsed']:9.0f} reads/s  "
+                f"{result['writes'] / result['elapsed']:8.0f} writes/s  "
+                f"{result['locked']:6d} 'database is locked' errors"
+            )
+
+    def _run(self, pragmas, readers, writers, seconds, rows, **options):
+        # A fresh file per run: journal_mode=WAL is persistent, so reusing one
+        # would leak the tuned mode into the stock run.
+        fd, path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(fd)
+        try:
+            self._seed(path, rows)
+            counts = {'reads': 0, 'writes': 0, 'locked': 0}
+            lock = threading.Lock()
+            stop = threading.Event()
+
+            def worker(write):
+                # Same connect() defaults as Django's sqlite3 backend
+                conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+                apply_pragmas(conn.cursor(), pragmas)
+                done = locked = 0
+                n = 0
+                while not stop.is_set():
+                    n += 1
+                    try:
+                        if write:
+                            conn.execute(
+                                "INSERT INTO payment (transaction_id, amount, created_at) "
+                                "VALUES (?, ?, datetime('now'))", (n % 500, '25.00'))
+                        else:
+                            conn.execute(
+                                "SELECT SUM(amount) FROM payment WHERE transaction_id = ?", (n % 500,)
+                            ).fetchone()
+                        done += 1
+                    except sqlite3.OperationalError as exc:
+                        if 'locked' not in str(exc):
+                            raise
+                        locked += 1
+                conn.close()
+                with lock:
+                    counts['writes' if write else 'reads'] += done
+                    counts['locked'] += locked
+
+            threads = [threading.Thread(target=worker, args=(False,)) for _ in range(readers)]
+            threads += [threading.Thread(target=worker, args=(True,)) for _ in range(writers)]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            time.sleep(seconds)
+            stop.set()
+            for thread in threads:
+                thread.join()
+            counts['elapsed'] = time.perf_counter() - started
+            return counts
+        finally:
+            for suffix in ('', '-wal', '-shm', '-journal'):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+
+    def _seed(self, path, rows):
+        conn = sqlite3.connect(path)
+        conn.executescript(SCHEMA)
+        conn.executemany(
+            "INSERT INTO payment (transaction_id, amount, created_at) VALUES (?, ?, datetime('now'))",
+            ((i % 500, '25.00') for i in range(rows)),
+        )
+        conn.commit()
+        conn.close()
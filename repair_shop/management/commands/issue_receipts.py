@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Sum
+
+from repair_shop.models import GadgetRepairTransaction
+from repair_shop.service import GadgetTransactionReceiptService
+
+
+class Command(BaseCommand):
+    help = 'Issue receipts for every completed, fully paid repair that does not have one yet (month-end closing)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Receipts created per transaction (default 500)')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many receipts would be issued')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            pending = GadgetRepairTransaction.objects.awaiting_receipt().order_by().aggregate(
+                repairs=Count('id'), total=Sum('payments_total'),
+            )
+            self.stdout.write(f"{pending['repairs']} repair(s) awaiting a receipt, D{pending['total'] or 0:.2f} in total")
+            return
+
+        result = GadgetTransactionReceiptService.issue_pending_receipts(batch_size=options['batch_size'])
+        if result['success']:
+            self.stdout.write(self.style.SUCCESS(f"✓ {result['message']}"))
+        else:
+            self.stderr.write(self.style.ERROR(result['message']))
@@ -0,0 +1,67 @@
+import csv
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from repair_shop.reconciliation import MATCHED, StatementMatcher
+
+
+class Command(BaseCommand):
+    help = 'Match a mobile-money provider statement (CSV) against recorded payments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('statement', help='Path to the provider statement CSV')
+        parser.add_argument('--provider', default=None,
+                            help='Only match payments recorded for this provider (e.g. Wave)')
+        parser.add_argument('--window', type=int, default=60,
+                            help='Minutes between statement time and recorded payment (default 60)')
+        parser.add_argument('--output', default=None,
+                            help='Write every statement line with its result to this CSV file')
+
+    def handle(self, *args, **options):
+        path = options['statement']
+        matcher = StatementMatcher(
+            window=datetime.timedelta(minutes=options['window']), provider=options['provider'],
+        )
+
+        def open_lines():
+            with open(path, newline='', encoding='utf-8-sig') as statement:
+                yield from statement
+
+        output = open(options['output'], 'w', newline='', encoding='utf-8') if options['output'] else None
+        try:
+            writer = csv.writer(output) if output else None
+            if writer:
+                writer.writerow(['Line', 'Result', 'Number', 'Amount', 'Timestamp', 'Reference',
+                                 'Payment ID', 'Repair Code', 'Recorded At', 'Error'])
+            for status, line, payment in matcher.match(open_lines):
+                if not writer:
+                    continue
+                if line is None:
+                    writer.writerow([payment['line_no'], status, '', '', '', '', '', '', '', payment['error']])
+                    continue
+                writer.writerow([
+                    line.line_no, status, line.number, f'{line.amount_display:.2f}',
+                    line.timestamp.isoformat(), line.reference,
+                    payment['id'] if status == MATCHED else '',
+                    payment['transaction_code'] if status == MATCHED else '',
+                    payment['created_at'].isoformat() if status == MATCHED else '', '',
+                ])
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+        finally:
+            if output:
+                output.close()
+
+        counts = matcher.counts
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ {counts['matched']} matched, {counts['unmatched']} unmatched, "
+            f"{counts['duplicate']} duplicate, {counts['invalid']} invalid line(s)"
+        ))
+        unmatched = matcher.unmatched_payments()
+        self.stdout.write(f'{len(unmatched)} recorded payment(s) in the statement period have no statement line')
+        for payment in unmatched[:20]:
+            self.stdout.write(
+                f"  #{payment['id']} {payment['transaction_code']} D{payment['amount']:.2f} "
+                f"{payment['mobile_number']} at {payment['created_at']:%Y-%m-%d %H:%M}"
+            )
@@ -0,0 +1,34 @@
+import datetime
+import shutil
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from repair_shop.service import ReceiptPdfService
+
+
+class Command(BaseCommand):
+    help = 'Render every receipt issued on a day into one multi-page PDF (for print runs)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', default=None, help='Day to render, YYYY-MM-DD (default today)')
+        parser.add_argument('--output', default=None, help='Copy the PDF here (default: just report the cache path)')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Rendering processes (default settings.RECEIPT_PDF_WORKERS, 0 = one per CPU)')
+
+    def handle(self, *args, **options):
+        try:
+            day = datetime.date.fromisoformat(options['date']) if options['date'] else timezone.localdate()
+        except ValueError:
+            raise CommandError(f"--date must be YYYY-MM-DD, got {options['date']!r}")
+
+        result = ReceiptPdfService.daily_batch_pdf(day, workers=options['workers'])
+        if not result['success']:
+            self.stdout.write(result['message'])
+            return
+
+        path = result['path']
+        if options['output']:
+            path = shutil.copyfile(result['path'], options['output'])
+        source = 'cached' if result['cached'] else 'rendered'
+        self.stdout.write(self.style.SUCCESS(f"✓ {result['message']} ({source}) → {path}"))
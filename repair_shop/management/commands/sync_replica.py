@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from repair_shop.db import sync_sqlite_replica
+from repair_shop.routers import replica_alias
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database onto the read replica (sqlite3 backup API)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=float, default=0,
+                            help='Keep syncing every N seconds instead of once')
+
+    def handle(self, *args, **options):
+        replica = replica_alias()
+        if replica is None:
+            raise CommandError('No replica database configured (set DATABASE_REPLICA_URL)')
+
+        while True:
+            started = time.perf_counter()
+            try:
+                sync_sqlite_replica(DEFAULT_DB_ALIAS, replica)
+            except ValueError as exc:
+                raise CommandError(str(exc))
+            self.stdout.write(self.style.SUCCESS(
+                f'✓ Replica synced in {(time.perf_counter() - started) * 1000:.0f} ms'
+            ))
+            if not options['every']:
+                break
+            time.sleep(options['every'])
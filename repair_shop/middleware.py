@@ -0,0 +1,20 @@
+from .routers import pin_to_primary, replica_alias
+
+
+class ReplicaPinningMiddleware:
+    """
+    Pin a session to the primary database after it writes.
+
+    Any non-GET/HEAD request may have written, so the session reads from the
+    primary until the replica has had time to catch up (read-your-writes).
+    Must come after SessionMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in ('GET', 'HEAD', 'OPTIONS') and replica_alias() is not None:
+            pin_to_primary(request)
+        return response
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.24 on 2026-10-19 12:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repair_shop', '0004_add_payment_pending_notification_type'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gadgetrepairtransaction',
+            index=models.Index(fields=['brought_in_date'], name='repair_brought_in_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gadgetrepairtransaction',
+            index=models.Index(fields=['status', 'updated_at'], name='repair_status_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['created_at'], name='payment_created_idx'),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 4.2.24 on 2026-10-19 13:02
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repair_shop', '0005_timeseries_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedRepairTransaction',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('Pending', 'Pending'), ('In Progress', 'In Progress'), ('Completed', 'Completed')], max_length=50)),
+                ('brought_in_date', models.DateTimeField()),
+                ('code', models.CharField(max_length=100, unique=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('logs_total', models.DecimalField(decimal_places=2, max_digits=12, null=True)),
+                ('payments_total', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('gadget', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_repairs', to='repair_shop.gadget')),
+                ('technician', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Archived Repair Transaction',
+                'verbose_name_plural': 'Archived Repair Transactions',
+                'ordering': ['-brought_in_date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedRepairLog',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('repair_date', models.DateTimeField()),
+                ('repair_cost', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('issue_description', models.TextField()),
+                ('resolution_description', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('transaction', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='repair_logs', to='repair_shop.archivedrepairtransaction')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedReceipt',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('amount_paid', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('issued_date', models.DateTimeField()),
+                ('receipt_number', models.CharField(max_length=100, unique=True)),
+                ('transaction', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='receipts', to='repair_shop.archivedrepairtransaction')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedPayment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('payment_type', models.CharField(choices=[('CASH', 'Cash'), ('MOBILE_MONEY', 'Mobile Money')], max_length=20)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('mobile_provider', models.CharField(blank=True, default='', max_length=100)),
+                ('mobile_number', models.CharField(blank=True, default='', max_length=30)),
+                ('notes', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('recorded_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('transaction', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payments', to='repair_shop.archivedrepairtransaction')),
+            ],
+        ),
+    ]
@@ -0,0 +1,126 @@
+# Generated by Django 4.2.24 on 2026-10-19 13:04
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def backfill_completion(apps, schema_editor):
+    """
+    Best available history for existing repairs: updated_at stands in for
+    completed_at, and each repair, live or archived, gets one event for its
+    current status.
+    """
+    GadgetRepairTransaction = apps.get_model('repair_shop', 'GadgetRepairTransaction')
+    ArchivedRepairTransaction = apps.get_model('repair_shop', 'ArchivedRepairTransaction')
+    RepairStatusEvent = apps.get_model('repair_shop', 'RepairStatusEvent')
+    ArchivedRepairStatusEvent = apps.get_model('repair_shop', 'ArchivedRepairStatusEvent')
+
+    for model in (GadgetRepairTransaction, ArchivedRepairTransaction):
+        model.objects.filter(status='Completed', completed_at__isnull=True).update(
+            completed_at=models.F('updated_at'),
+        )
+    RepairStatusEvent.objects.bulk_create(
+        [
+            RepairStatusEvent(
+                transaction_id=repair['id'], to_status=repair['status'],
+                changed_at=repair['completed_at'] or repair['brought_in_date'],
+            )
+            for repair in GadgetRepairTransaction.objects.values('id', 'status', 'completed_at', 'brought_in_date')
+        ],
+        batch_size=1000,
+    )
+    # Archived events normally keep their live id; these never had one, so
+    # they take the negated repair id, which no live event id can reach
+    ArchivedRepairStatusEvent.objects.bulk_create(
+        [
+            ArchivedRepairStatusEvent(
+                id=-repair['id'], transaction_id=repair['id'], to_status=repair['status'],
+                changed_at=repair['completed_at'] or repair['brought_in_date'],
+            )
+            for repair in ArchivedRepairTransaction.objects.values('id', 'status', 'completed_at', 'brought_in_date')
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repair_shop', '0006_archive_tier'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedRepairStatusEvent',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('from_status', models.CharField(blank=True, default='', max_length=50)),
+                ('to_status', models.CharField(choices=[('Pending', 'Pending'), ('In Progress', 'In Progress'), ('Completed', 'Completed')], max_length=50)),
+                ('changed_at', models.DateTimeField()),
+            ],
+            options={
+                'ordering': ['changed_at', 'id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RepairStatusEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, default='', max_length=50)),
+                ('to_status', models.CharField(choices=[('Pending', 'Pending'), ('In Progress', 'In Progress'), ('Completed', 'Completed')], max_length=50)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['changed_at', 'id'],
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='gadgetrepairtransaction',
+            name='repair_status_updated_idx',
+        ),
+        migrations.AddField(
+            model_name='archivedrepairtransaction',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='gadgetrepairtransaction',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='gadgetrepairtransaction',
+            index=models.Index(fields=['status', 'completed_at'], name='repair_status_completed_idx'),
+        ),
+        migrations.AddField(
+            model_name='repairstatusevent',
+            name='changed_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='repairstatusevent',
+            name='transaction',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_events', to='repair_shop.gadgetrepairtransaction'),
+        ),
+        migrations.AddField(
+            model_name='archivedrepairstatusevent',
+            name='changed_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='archivedrepairstatusevent',
+            name='transaction',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_events', to='repair_shop.archivedrepairtransaction'),
+        ),
+        migrations.AddIndex(
+            model_name='repairstatusevent',
+            index=models.Index(fields=['to_status', 'changed_at'], name='status_event_period_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='repairstatusevent',
+            index=models.Index(fields=['transaction', 'changed_at'], name='status_event_repair_idx'),
+        ),
+        migrations.RunPython(backfill_completion, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.24 on 2026-10-19 13:09
+
+from django.db import migrations, models
+
+
+def check_no_duplicate_active_repairs(apps, schema_editor):
+    """Fail with a readable message instead of a bare IntegrityError on existing duplicates."""
+    GadgetRepairTransaction = apps.get_model('repair_shop', 'GadgetRepairTransaction')
+    duplicates = list(
+        GadgetRepairTransaction.objects.filter(status__in=['Pending', 'In Progress'])
+        .values('gadget_id').annotate(n=models.Count('id')).filter(n__gt=1)
+        .values_list('gadget_id', flat=True)
+    )
+    if duplicates:
+        raise RuntimeError(
+            'These gadgets have more than one Pending/In Progress repair; complete or '
+            f'remove the extras before migrating: gadget ids {sorted(duplicates)}'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repair_shop', '0007_completed_at_status_events'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_no_duplicate_active_repairs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='gadgetrepairtransaction',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['Pending', 'In Progress'])), fields=('gadget',), name='one_active_repair_per_gadget', violation_error_message='This gadget already has an active repair.'),
+        ),
+    ]
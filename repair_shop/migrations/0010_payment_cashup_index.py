@@ -0,0 +1,21 @@
+# Generated by Django 4.2.24 on 2026-10-19 13:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repair_shop', '0009_payment_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['created_at', 'payment_type'], name='payment_cashup_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='payment',
+            name='payment_created_idx',
+        ),
+    ]
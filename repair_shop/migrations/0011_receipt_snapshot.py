@@ -0,0 +1,23 @@
+# Generated by Django 4.2.24 on 2026-10-19 13:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repair_shop', '0010_payment_cashup_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedreceipt',
+            name='snapshot',
+            field=models.BinaryField(null=True),
+        ),
+        migrations.AddField(
+            model_name='gadgettransactionreceipt',
+            name='snapshot',
+            field=models.BinaryField(null=True),
+        ),
+    ]
@@ -1,7 +1,18 @@
 
 import uuid
 import datetime
-from django.db import models
+import json
+import zlib
+from decimal import Decimal
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction as db_transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from . import permissions
+from .cache import bump_generation, invalidate_repair_status
 from django.contrib.auth.models import AbstractBaseUser , BaseUserManager
 import datetime
 # Create your models here.
@@ -63,63 +74,47 @@ class MyUser(AbstractBaseUser,CreatedModel):
     
     objects = MyUserManager()
 
-    # Role-based permission sets
-    _TECHNICIAN_PERMS = {
-        'repair_shop.view_gadget',
-        'repair_shop.view_gadgetrepairtransaction',
-        'repair_shop.add_gadgetrepairlog',
-        'repair_shop.change_gadgetrepairlog',
-        'repair_shop.view_gadgetrepairlog',
-        'repair_shop.change_gadgetrepairtransaction',
-    }
-
-    _SECRETARY_PERMS = {
-        'repair_shop.view_customer', 'repair_shop.add_customer', 'repair_shop.change_customer',
-        'repair_shop.view_gadget', 'repair_shop.add_gadget', 'repair_shop.change_gadget',
-        'repair_shop.view_gadgetrepairtransaction', 'repair_shop.add_gadgetrepairtransaction',
-        # Secretary can VIEW logs (to understand what was done) but cannot ADD or EDIT them.
-        # Adding/editing repair logs is the technician's responsibility.
-        'repair_shop.view_gadgetrepairlog',
-        'repair_shop.add_gadgettransactionreceipt', 'repair_shop.view_gadgettransactionreceipt',
-        'repair_shop.add_payment', 'repair_shop.view_payment',
-        'repair_shop.view_notification',
-    }
-
-    _STAFF_PERMS = _SECRETARY_PERMS | {
-        'repair_shop.change_gadgetrepairtransaction',
-        'repair_shop.change_gadgetrepairlog',
-        'repair_shop.delete_customer',
-        'repair_shop.delete_gadget',
-        'repair_shop.delete_gadgetrepairlog',
-        'repair_shop.delete_gadgetrepairtransaction',
-        'repair_shop.view_gadgettransactionreceipt',
-        'repair_shop.change_gadgettransactionreceipt',
-        'repair_shop.change_payment', 'repair_shop.delete_payment',
-        'repair_shop.view_notification', 'repair_shop.change_notification',
-    }
+    def get_session_auth_hash(self):
+        # Users rebuilt from a cached snapshot (backends.CachedUserBackend)
+        # carry the hash, so verifying the session doesn't load the password.
+        # Once the password is loaded or changed, it is recomputed as usual.
+        if 'password' not in self.__dict__ and '_session_auth_hash' in self.__dict__:
+            return self._session_auth_hash
+        return super().get_session_auth_hash()
+
+    # Role permissions live in permissions.py; checks are bit tests against
+    # the OR of the user's role masks, computed once per instance (request.user
+    # is rebuilt every request, so this is a per-request memo)
+    def _role_mask(self):
+        flags = tuple(getattr(self, flag) for flag, _mask in permissions.FLAG_MASKS)
+        memo = self.__dict__.get('_role_mask_memo')
+        if memo is None or memo[0] != flags:
+            memo = (flags, permissions.role_mask(self))
+            self._role_mask_memo = memo
+        return memo[1]
 
     def has_perm(self, perm, obj=None):
         if not self.is_active:
             return False
         if self.is_admin or self.is_superuser:
             return True
-        # Role-based permission checking using user flag fields
-        if self.is_technician and perm in self._TECHNICIAN_PERMS:
-            return True
-        if self.is_secretary and perm in self._SECRETARY_PERMS:
-            return True
-        if self.is_staff and perm in self._STAFF_PERMS:
+        bit = permissions.PERMISSION_BITS.get(perm)
+        return bit is not None and bool(self._role_mask() & bit)
+
+    def has_perms(self, perm_list, obj=None):
+        if not self.is_active:
+            return False
+        if self.is_admin or self.is_superuser:
             return True
-        return False
+        needed = permissions.permissions_mask(perm_list)
+        return needed is not None and self._role_mask() & needed == needed
 
     def has_module_perms(self, app_label):
         if not self.is_active:
             return False
         if self.is_admin or self.is_superuser:
             return True
-        if app_label == 'repair_shop':
-            return self.is_technician or self.is_secretary or self.is_staff
-        return False
+        return bool(self._role_mask() & permissions.MODULE_MASKS.get(app_label, 0))
 
     def get_full_name(self):
         return f"{self.first_name} {self.last_name}"
@@ -211,6 +206,128 @@ class GadgetRepairLog( CreatedModel):
    def __str__(self):
        return f"Repair Log for {self.transaction.gadget} on {self.repair_date}"
 
+
+class GadgetRepairTransactionQuerySet(models.QuerySet):
+
+    # Receivables aging bands: (key, label, max age in days — None = open-ended)
+    AGING_BUCKETS = [
+        ('0-7', '0–7 days', 7),
+        ('8-30', '8–30 days', 30),
+        ('31-90', '31–90 days', 90),
+        ('90+', 'Over 90 days', None),
+    ]
+
+    def with_balances(self):
+        """
+        Annotate each repair with logs_total, payments_total and outstanding.
+        Both totals are correlated subqueries so logs and payments never
+        multiply each other through a join. logs_total stays NULL when no
+        price has been quoted (the SQL equivalent of has_price=False).
+        """
+        from django.db.models import OuterRef, Subquery, Sum, Value, DecimalField
+        from django.db.models.functions import Coalesce
+
+        money = DecimalField(max_digits=12, decimal_places=2)
+        logs_total = Subquery(
+            GadgetRepairLog.objects.filter(transaction=OuterRef('pk'))
+            .order_by().values('transaction')
+            .annotate(total=Sum('repair_cost')).values('total'),
+            output_field=money,
+        )
+        payments_total = Subquery(
+            Payment.objects.filter(transaction=OuterRef('pk'))
+            .order_by().values('transaction')
+            .annotate(total=Sum('amount')).values('total'),
+            output_field=money,
+        )
+        return self.annotate(
+            logs_total=logs_total,
+            payments_total=Coalesce(payments_total, Value(0), output_field=money),
+        ).annotate(
+            outstanding=models.ExpressionWrapper(
+                Coalesce(models.F('logs_total'), Value(0), output_field=money)
+                - models.F('payments_total'),
+                output_field=money,
+            ),
+        )
+
+    def awaiting_payment(self):
+        """Completed repairs that have a price and are not fully paid, largest/oldest first."""
+        return self.with_balances().filter(
+            status=GadgetRepairTransaction.COMPLETED,
+            logs_total__isnull=False,
+            outstanding__gt=0,
+        ).order_by('-outstanding', 'brought_in_date')
+
+    def awaiting_receipt(self):
+        """Completed, priced and fully paid repairs that have no receipt yet, oldest completion first."""
+        from django.db.models import Exists, OuterRef
+
+        return self.with_balances().filter(
+            status=GadgetRepairTransaction.COMPLETED,
+            logs_total__isnull=False,
+            outstanding__lte=0,
+        ).filter(
+            ~Exists(GadgetTransactionReceipt.objects.filter(transaction=OuterRef('pk')))
+        ).order_by('completed_at', 'id')
+
+    def with_age_bucket(self, now):
+        """
+        Annotate age_bucket (an AGING_BUCKETS key) from completed_at.
+        A repair completed N whole days ago is N days old.
+        """
+        whens = [
+            models.When(
+                completed_at__gt=now - datetime.timedelta(days=max_days + 1),
+                then=models.Value(key),
+            )
+            for key, _label, max_days in self.AGING_BUCKETS if max_days is not None
+        ]
+        return self.annotate(age_bucket=models.Case(
+            *whens,
+            default=models.Value(self.AGING_BUCKETS[-1][0]),
+            output_field=models.CharField(),
+        ))
+
+    def receivables_aging(self, now):
+        """
+        Outstanding balances of all completed repairs grouped into aging bands
+        with ONE grouped query. Returns every band, including empty ones.
+        """
+        rows = (
+            self.awaiting_payment().with_age_bucket(now)
+            .order_by().values('age_bucket')
+            .annotate(repairs=models.Count('id'), outstanding_total=models.Sum('outstanding'))
+        )
+        by_key = {row['age_bucket']: row for row in rows}
+        return [
+            {
+                'key': key,
+                'label': label,
+                'repairs': by_key.get(key, {}).get('repairs', 0),
+                'outstanding_total': by_key.get(key, {}).get('outstanding_total') or 0,
+            }
+            for key, label, _max_days in self.AGING_BUCKETS
+        ]
+
+    def settled(self):
+        """Completed repairs that are fully paid or were never priced."""
+        return self.with_balances().filter(
+            models.Q(logs_total__isnull=True) | models.Q(outstanding__lte=0),
+            status=GadgetRepairTransaction.COMPLETED,
+        )
+
+    def closed(self, before):
+        """Completed, fully paid and receipted repairs completed before ``before`` — ready to archive."""
+        receipts = GadgetTransactionReceipt.objects.filter(transaction=models.OuterRef('pk'))
+        return self.with_balances().filter(
+            models.Exists(receipts),
+            status=GadgetRepairTransaction.COMPLETED,
+            outstanding__lte=0,
+            completed_at__lt=before,
+        )
+
+
 class GadgetRepairTransaction(CreatedModel):
     PENDING = 'Pending'
     INPROGRESS = 'In Progress'
@@ -221,6 +338,16 @@ class GadgetRepairTransaction(CreatedModel):
         (INPROGRESS, 'In Progress'),
         (COMPLETED, 'Completed'),
     ]
+
+    # The status state machine: Pending → In Progress → Completed
+    ALLOWED_TRANSITIONS = {
+        PENDING: (INPROGRESS,),
+        INPROGRESS: (COMPLETED,),
+        COMPLETED: (),
+    }
+
+    ACTIVE_REPAIR_CONSTRAINT = 'one_active_repair_per_gadget'
+    ACTIVE_REPAIR_ERROR = 'This gadget already has an active repair.'
       
     gadget = models.ForeignKey('Gadget', on_delete=models.CASCADE)
     status = models.CharField(max_length=50, choices=STATUS_CHOICES, default=PENDING)
@@ -233,7 +360,10 @@ class GadgetRepairTransaction(CreatedModel):
         limit_choices_to={'is_technician': True}
     )
     code = models.CharField(max_length=100, unique=True)
+    # Set when the repair enters Completed (see transition)
+    completed_at = models.DateTimeField(null=True, blank=True)
 
+    objects = GadgetRepairTransactionQuerySet.as_manager()
 
     def __str__(self):
         return f"Repair Transaction for {self.gadget} -- {self.code}"
@@ -243,6 +373,20 @@ class GadgetRepairTransaction(CreatedModel):
         ordering = ['-brought_in_date']
         verbose_name = 'Repair Transaction'
         verbose_name_plural = 'Repair Transactions'
+        indexes = [
+            # Date-range scans for the analytics time series
+            models.Index(fields=['brought_in_date'], name='repair_brought_in_idx'),
+            models.Index(fields=['status', 'completed_at'], name='repair_status_completed_idx'),
+        ]
+        constraints = [
+            # At most one Pending/In Progress repair per gadget, as a partial unique index
+            models.UniqueConstraint(
+                fields=['gadget'],
+                condition=models.Q(status__in=['Pending', 'In Progress']),
+                name='one_active_repair_per_gadget',
+                violation_error_message='This gadget already has an active repair.',
+            ),
+        ]
 
     @property
     def transaction_code(self):
@@ -276,19 +420,122 @@ class GadgetRepairTransaction(CreatedModel):
         return self.total_due <= 0
     
 
-    def save (self, *args , **kwargs):
+    def save (self, *args , changed_by=None, **kwargs):
         if not self.code:
             self.code = self.generate_unique_code()
-        super().save(*args, **kwargs)
+        if not self._state.adding:
+            # Status changes of existing repairs go through transition()
+            super().save(*args, **kwargs)
+            return
+        if self.status == self.COMPLETED and self.completed_at is None:
+            self.completed_at = timezone.now()
+        with db_transaction.atomic():
+            super().save(*args, **kwargs)
+            RepairStatusEvent.objects.create(
+                transaction=self, to_status=self.status, changed_by=changed_by,
+                changed_at=self.completed_at or self.brought_in_date,
+            )
+
+    def get_constraints(self):
+        # The active-repair rule is left to its unique index at INSERT time:
+        # checking it in full_clean() would cost a query per form submit and
+        # still race concurrent intake. Callers map the IntegrityError instead.
+        return [
+            (model, [c for c in constraints if c.name != self.ACTIVE_REPAIR_CONSTRAINT])
+            for model, constraints in super().get_constraints()
+        ]
+
+    def can_transition_to(self, status):
+        return status in self.ALLOWED_TRANSITIONS.get(self.status, ())
+
+    def transition(self, status, changed_by=None):
+        """
+        Move the repair from its current status to ``status`` with a single
+        conditional UPDATE ... WHERE id = ? AND status = <current status>.
+
+        Returns False, leaving the row untouched, if someone else changed the
+        status since this instance was loaded (the caller should reload and
+        retry or report the conflict). Raises ValueError for moves the state
+        machine does not allow.
+        """
+        if not self.can_transition_to(status):
+            raise ValueError(f'A repair cannot move from {self.status} to {status}.')
+
+        now = timezone.now()
+        completed_at = now if status == self.COMPLETED else None
+        with db_transaction.atomic():
+            updated = GadgetRepairTransaction.objects.filter(pk=self.pk, status=self.status).update(
+                status=status, completed_at=completed_at, updated_at=now,
+            )
+            if not updated:
+                return False
+            RepairStatusEvent.objects.create(
+                transaction=self, from_status=self.status, to_status=status,
+                changed_by=changed_by, changed_at=now,
+            )
+        self.status, self.completed_at, self.updated_at = status, completed_at, now
+        # update() sends no post_save, so invalidate the cached widgets here
+        bump_generation(GadgetRepairTransaction)
+        invalidate_repair_status(self.code)
+        return True
+
+    def status_durations(self, now=None):
+        """Time spent in each status so far, from the status history: {status: timedelta}."""
+        now = now or timezone.now()
+        events = list(self.status_events.order_by('changed_at', 'id'))
+        durations = {}
+        for event, following in zip(events, events[1:] + [None]):
+            until = following.changed_at if following else now
+            if event.to_status == self.COMPLETED and following is None:
+                break  # Completed is terminal; it doesn't keep accruing time
+            durations[event.to_status] = durations.get(event.to_status, datetime.timedelta()) + (until - event.changed_at)
+        return durations
+
+    @property
+    def turnaround(self):
+        """Time from intake to completion, or None while still open."""
+        if self.completed_at is None:
+            return None
+        return self.completed_at - self.brought_in_date
 
     def generate_unique_code(self):
         return str(uuid.uuid4()).replace('-', '').upper()[:10]
 
+class RepairStatusEvent(models.Model):
+    """One status transition of a repair; from_status is blank for the initial status."""
+    transaction = models.ForeignKey(
+        'GadgetRepairTransaction', on_delete=models.CASCADE, related_name='status_events'
+    )
+    from_status = models.CharField(max_length=50, blank=True, default='')
+    to_status = models.CharField(max_length=50, choices=GadgetRepairTransaction.STATUS_CHOICES)
+    changed_by = models.ForeignKey(
+        'MyUser', on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['changed_at', 'id']
+        indexes = [
+            # Per-period transition counts, e.g. repairs started or completed this month
+            models.Index(fields=['to_status', 'changed_at'], name='status_event_period_idx'),
+            models.Index(fields=['transaction', 'changed_at'], name='status_event_repair_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.transaction.code}: {self.from_status or '—'} → {self.to_status} at {self.changed_at}"
+
+
+# Bump when the snapshot layout changes; receipt templates can branch on it
+RECEIPT_SNAPSHOT_VERSION = 1
+
+
 class GadgetTransactionReceipt(models.Model):
     transaction = models.ForeignKey('GadgetRepairTransaction', on_delete=models.CASCADE)
     amount_paid = models.DecimalField(max_digits=10, decimal_places=2)
     issued_date = models.DateTimeField(auto_now_add=True)
     receipt_number = models.CharField(max_length=100, unique=True)
+    # zlib-compressed JSON of what the receipt shows, captured at issuance (see freeze())
+    snapshot = models.BinaryField(null=True, editable=False)
 
 
     def save (self, *args , **kwargs):
@@ -298,18 +545,125 @@ class GadgetTransactionReceipt(models.Model):
 
 
     def generate_receipt_number (self):
-        count =  self.get_num_receipt() + 1
-        return f"REC-{current_year()}-{str(count).zfill(4)}"
-    
-    def get_num_receipt(self):
-        num_receipt = GadgetTransactionReceipt.objects.filter(issued_date__year = current_year()).count()
-        return num_receipt
-
+        return self.receipt_number_block(1)[0]
+
+    @staticmethod
+    def last_receipt_sequence(year):
+        """
+        Highest sequence number issued as REC-<year>-NNNN, live or archived
+        (0 if none). Taken from the numbers themselves rather than a row
+        count, so deleted receipts never make the next number collide.
+        """
+        from django.db.models.functions import Cast, Substr
+
+        prefix = f"REC-{year}-"
+        highest = 0
+        for model in (GadgetTransactionReceipt, ArchivedReceipt):
+            value = (
+                model.objects.filter(receipt_number__regex=rf'^{prefix}[0-9]+$')
+                .annotate(sequence=Cast(Substr('receipt_number', len(prefix) + 1), models.IntegerField()))
+                .aggregate(highest=models.Max('sequence'))['highest']
+            )
+            highest = max(highest, value or 0)
+        return highest
+
+    @staticmethod
+    def receipt_number_block(size):
+        """``size`` consecutive numbers after this year's highest one, e.g. REC-2026-0042 … REC-2026-0141."""
+        year = current_year()
+        first = GadgetTransactionReceipt.last_receipt_sequence(year) + 1
+        return [f"REC-{year}-{str(count).zfill(4)}" for count in range(first, first + size)]
+
+    @staticmethod
+    def snapshot_queryset(repairs):
+        """``repairs`` with everything build_snapshot() reads: three queries however many rows."""
+        return repairs.select_related('gadget__customer', 'technician').prefetch_related(
+            models.Prefetch('repair_logs', queryset=GadgetRepairLog.objects.order_by('repair_date', 'id')),
+            models.Prefetch('payments', queryset=Payment.objects.order_by('created_at', 'id')),
+        )
+
+    @staticmethod
+    def build_snapshot(repair):
+        """Compressed snapshot of a repair loaded through snapshot_queryset()."""
+        gadget, customer = repair.gadget, repair.gadget.customer
+        payment_types = dict(Payment.PAYMENT_TYPE_CHOICES)
+        items = [
+            {'issue': log.issue_description, 'resolution': log.resolution_description or '', 'cost': log.repair_cost}
+            for log in repair.repair_logs.all()
+        ]
+        payments = [
+            {'method': payment_types.get(p.payment_type, p.payment_type), 'provider': p.mobile_provider or '',
+             'number': p.mobile_number or '', 'amount': p.amount, 'date': p.created_at}
+            for p in repair.payments.all()
+        ]
+        data = {
+            'version': RECEIPT_SNAPSHOT_VERSION,
+            'transaction_code': repair.code,
+            'brought_in_date': repair.brought_in_date,
+            'device': {
+                'brand': gadget.gadget_brand, 'model': gadget.gadget_model or '',
+                'type': gadget.get_gadget_type_display(),
+                'imei': gadget.imei_number or '', 'serial': gadget.serial_number or '',
+            },
+            'customer': {
+                'first_name': customer.first_name, 'last_name': customer.last_name,
+                'phone_number': customer.phone_number or '', 'email': customer.email or '',
+            },
+            'technician': repair.technician.get_full_name() if repair.technician else '',
+            'items': items,
+            'payments': payments,
+            'total_cost': sum((item['cost'] for item in items), Decimal('0')),
+        }
+        return zlib.compress(json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':')).encode())
+
+    def freeze(self):
+        """
+        Capture the repair as issued (device, customer, technician, line items,
+        payments, totals) into ``snapshot``. Reprints render from it, so later
+        edits to the repair, its logs or the customer never change a receipt.
+        """
+        repair = self.snapshot_queryset(GadgetRepairTransaction.objects.filter(pk=self.transaction_id)).get()
+        self.snapshot = self.build_snapshot(repair)
+
+    @cached_property
+    def frozen(self):
+        """The decoded snapshot, with amounts as Decimal and dates as datetime."""
+        data = json.loads(zlib.decompress(self.snapshot))
+        data['brought_in_date'] = parse_datetime(data['brought_in_date'])
+        data['total_cost'] = Decimal(data['total_cost'])
+        for item in data['items']:
+            item['cost'] = Decimal(item['cost'])
+        for payment in data['payments']:
+            payment['amount'] = Decimal(payment['amount'])
+            payment['date'] = parse_datetime(payment['date'])
+        return data
 
     def __str__(self):
         return f"Receipt for {self.receipt_number}"
 
 
+class PaymentQuerySet(models.QuerySet):
+
+    def cash_up(self, start, end):
+        """
+        End-of-day totals for payments taken in [start, end), one row per
+        (day, payment_type, mobile_provider, recorded_by) with the payment
+        count and total amount. A single grouped query; the range filter and
+        the grouping are served by payment_cashup_idx.
+        """
+        from django.db.models import Count, Sum
+        from django.db.models.functions import TruncDate
+
+        return (
+            self.filter(created_at__gte=start, created_at__lt=end)
+            .annotate(day=TruncDate('created_at'))
+            .order_by()
+            .values('day', 'payment_type', 'mobile_provider', 'recorded_by', 'recorded_by__username')
+            .annotate(payments=Count('id'), total=Sum('amount'))
+            .order_by('-day', 'payment_type', 'mobile_provider', 'recorded_by__username')
+        )
+
+
 class Payment(CreatedModel):
     """Records individual payments (cash or mobile money) against a repair transaction."""
     CASH = 'CASH'
@@ -333,9 +687,18 @@ class Payment(CreatedModel):
         'MyUser', on_delete=models.SET_NULL, null=True, blank=True,
         related_name='recorded_payments'
     )
+    # Client-generated token (one per rendered payment form): a resubmitted
+    # form carries the same key, so the payment is recorded once
+    idempotency_key = models.CharField(max_length=64, null=True, blank=True, unique=True, editable=False)
+
+    objects = PaymentQuerySet.as_manager()
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Leading created_at also serves the plain date-range filters
+            models.Index(fields=['created_at', 'payment_type'], name='payment_cashup_idx'),
+        ]
 
     def __str__(self):
         return f"Payment D{self.amount} ({self.payment_type}) for {self.transaction.code}"
@@ -373,5 +736,86 @@ class Notification(CreatedModel):
         return f"[{self.notification_type}] → {self.recipient}: {self.title}"
 
 
+# ============================================
+# ARCHIVE TIER
+# ============================================
+# Closed repairs are moved here by ArchiveService (service.py) so the hot
+# tables above only hold live work. Rows keep their original ids; gadgets,
+# customers and users are never archived, so those links stay real FKs.
 
+class ArchivedRepairTransaction(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    gadget = models.ForeignKey('Gadget', on_delete=models.CASCADE, related_name='archived_repairs')
+    status = models.CharField(max_length=50, choices=GadgetRepairTransaction.STATUS_CHOICES)
+    brought_in_date = models.DateTimeField()
+    technician = models.ForeignKey('MyUser', on_delete=models.SET_NULL, null=True, related_name='+')
+    code = models.CharField(max_length=100, unique=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    # Balances frozen at archive time, named like with_balances() annotations
+    # so history templates treat both tiers alike
+    logs_total = models.DecimalField(max_digits=12, decimal_places=2, null=True)
+    payments_total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    is_archived = True
+
+    class Meta:
+        ordering = ['-brought_in_date']
+        verbose_name = 'Archived Repair Transaction'
+        verbose_name_plural = 'Archived Repair Transactions'
+
+    def __str__(self):
+        return f"Archived Repair Transaction for {self.gadget} -- {self.code}"
 
+    @property
+    def transaction_code(self):
+        return self.code
+
+
+class ArchivedRepairLog(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    transaction = models.ForeignKey('ArchivedRepairTransaction', on_delete=models.CASCADE, related_name='repair_logs')
+    repair_date = models.DateTimeField()
+    repair_cost = models.DecimalField(max_digits=10, decimal_places=2)
+    issue_description = models.TextField()
+    resolution_description = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+
+class ArchivedPayment(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    transaction = models.ForeignKey('ArchivedRepairTransaction', on_delete=models.CASCADE, related_name='payments')
+    payment_type = models.CharField(max_length=20, choices=Payment.PAYMENT_TYPE_CHOICES)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    mobile_provider = models.CharField(max_length=100, blank=True, default='')
+    mobile_number = models.CharField(max_length=30, blank=True, default='')
+    notes = models.TextField(blank=True, default='')
+    recorded_by = models.ForeignKey('MyUser', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+
+class ArchivedRepairStatusEvent(models.Model):
+    # The live event's id; events backfilled for repairs archived before
+    # status history existed (migration 0007) use the negated repair id
+    id = models.BigIntegerField(primary_key=True)
+    transaction = models.ForeignKey('ArchivedRepairTransaction', on_delete=models.CASCADE, related_name='status_events')
+    from_status = models.CharField(max_length=50, blank=True, default='')
+    to_status = models.CharField(max_length=50, choices=GadgetRepairTransaction.STATUS_CHOICES)
+    changed_by = models.ForeignKey('MyUser', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    changed_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['changed_at', 'id']
+
+
+class ArchivedReceipt(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    transaction = models.ForeignKey('ArchivedRepairTransaction', on_delete=models.CASCADE, related_name='receipts')
+    amount_paid = models.DecimalField(max_digits=10, decimal_places=2)
+    issued_date = models.DateTimeField()
+    receipt_number = models.CharField(max_length=100, unique=True)
+    snapshot = models.BinaryField(null=True, editable=False)
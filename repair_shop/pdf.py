@@ -0,0 +1,256 @@
+"""
+Minimal PDF writer for receipts, with no third-party dependency.
+
+Pages are drawn with the base-14 Helvetica fonts, which every PDF viewer
+ships, so nothing is embedded. Text is WinAnsi (cp1252) encoded, and each
+page's content stream is zlib-compressed (FlateDecode).
+
+Rendering is split in two:
+- ``render_receipt(document)`` lays out one receipt and returns its
+  compressed page streams.
+- ``build_pdf(pages)`` wraps any number of page streams into a file.
+
+Batches render receipts in worker processes and assemble once. That is why
+this module imports nothing from Django: a worker can import it without
+setting Django up. ``document`` is the plain dict built by
+ReceiptPdfService.document().
+"""
+import zlib
+
+
+# Bump when the receipt layout changes, so cached PDFs are rendered afresh
+LAYOUT_VERSION = 1
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842      # A4, in points
+MARGIN = 50
+CONTENT_WIDTH = PAGE_WIDTH - 2 * MARGIN
+
+REGULAR, BOLD = 'F1', 'F2'
+FONTS = {REGULAR: 'Helvetica', BOLD: 'Helvetica-Bold'}
+
+# Glyph widths (1/1000 em) for ASCII 32..126, from the Adobe AFM files
+_WIDTHS = {
+    REGULAR: (
+        278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+        556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+        1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+        667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+        333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+        556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+    ),
+    BOLD: (
+        278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+        556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+        975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+        667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+        333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+        611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584,
+    ),
+}
+_DEFAULT_WIDTH = 556
+
+
+def text_width(text, size, font=REGULAR):
+    widths = _WIDTHS[font]
+    units = sum(widths[ord(ch) - 32] if 32 <= ord(ch) < 127 else _DEFAULT_WIDTH for ch in text)
+    return units * size / 1000
+
+
+def wrap(text, width, size, font=REGULAR):
+    """Split ``text`` into lines no wider than ``width``; over-long words are broken."""
+    lines, line = [], ''
+    for word in ' '.join(text.split()).split(' '):
+        candidate = f'{line} {word}' if line else word
+        if text_width(candidate, size, font) <= width:
+            line = candidate
+            continue
+        if line:
+            lines.append(line)
+        while text_width(word, size, font) > width:
+            cut = len(word) - 1
+            while cut > 1 and text_width(word[:cut], size, font) > width:
+                cut -= 1
+            lines.append(word[:cut])
+            word = word[cut:]
+        line = word
+    if line or not lines:
+        lines.append(line)
+    return lines
+
+
+def _literal(text):
+    raw = ' '.join(str(text).split()).encode('cp1252', 'replace')
+    return b'(' + raw.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+class Page:
+    """Drawing operations for one page; coordinates are points from the bottom-left corner."""
+
+    def __init__(self):
+        self.ops = []
+
+    def text(self, x, y, text, size=10, font=REGULAR, align='left'):
+        if align == 'right':
+            x -= text_width(text, size, font)
+        elif align == 'center':
+            x -= text_width(text, size, font) / 2
+        self.ops.append(b'BT /%s %g Tf %.2f %.2f Td %s Tj ET' % (font.encode(), size, x, y, _literal(text)))
+
+    def line(self, x1, y1, x2, y2, width=0.5):
+        self.ops.append(b'%g w %.2f %.2f m %.2f %.2f l S' % (width, x1, y1, x2, y2))
+
+    def shade(self, x, y, w, h, gray=0.93):
+        self.ops.append(b'%g g %.2f %.2f %.2f %.2f re f 0 g' % (gray, x, y, w, h))
+
+    def stream(self):
+        return zlib.compress(b'\n'.join(self.ops))
+
+
+def build_pdf(pages, title=''):
+    """A complete PDF file (bytes) from compressed page streams, in order."""
+    fonts = len(FONTS)
+    first_page = 4 + fonts                      # 1 catalog, 2 page tree, 3 info, then fonts
+    page_ids = [first_page + 2 * n for n in range(len(pages))]
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [%s] /Count %d >>' % (b' '.join(b'%d 0 R' % pid for pid in page_ids), len(pages)),
+        b'<< /Title %s /Producer (Bayo Electronics) >>' % _literal(title),
+    ]
+    objects += [
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>' % name.encode()
+        for name in FONTS.values()
+    ]
+    font_refs = b' '.join(b'/%s %d 0 R' % (key.encode(), 4 + n) for n, key in enumerate(FONTS))
+    for pid, stream in zip(page_ids, pages):
+        objects.append(
+            b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Resources << /Font << %s >> >> '
+            b'/Contents %d 0 R >>' % (PAGE_WIDTH, PAGE_HEIGHT, font_refs, pid + 1)
+        )
+        objects.append(b'<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream' % (len(stream), stream))
+
+    out = bytearray(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    out += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    out += b'trailer\n<< /Size %d /Root 1 0 R /Info 3 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+# ── receipt layout ───────────────────────────────────────────────────────────
+
+class _ReceiptLayout:
+    LINE = 14
+
+    def __init__(self, document):
+        self.document = document
+        self.pages = []
+        self.new_page()
+
+    def new_page(self):
+        self.page = Page()
+        self.pages.append(self.page)
+        self.y = PAGE_HEIGHT - MARGIN
+        if len(self.pages) > 1:
+            self.page.text(MARGIN, self.y, f"Receipt {self.document['receipt_number']} (continued)", 9, BOLD)
+            self.y -= 2 * self.LINE
+
+    def ensure(self, height):
+        if self.y - height < MARGIN + 30:
+            self.new_page()
+
+    def heading(self, title):
+        self.ensure(3 * self.LINE)
+        self.y -= 8
+        self.page.text(MARGIN, self.y, title, 11, BOLD)
+        self.y -= 4
+        self.page.line(MARGIN, self.y, PAGE_WIDTH - MARGIN, self.y)
+        self.y -= self.LINE
+
+    def pairs(self, rows, x=MARGIN):
+        for label, value in rows:
+            self.ensure(self.LINE)
+            self.page.text(x, self.y, f'{label}:', 10, BOLD)
+            self.page.text(x + 90, self.y, value or 'N/A', 10)
+            self.y -= self.LINE
+
+    def table(self, columns, rows):
+        """``columns`` are (title, width, align); cells wrap within their column."""
+        def header():
+            self.page.shade(MARGIN, self.y - 4, CONTENT_WIDTH, self.LINE)
+            x = MARGIN
+            for title, width, align in columns:
+                self.page.text(x + width - 4 if align == 'right' else x + 4, self.y, title, 9, BOLD, align)
+                x += width
+            self.y -= self.LINE + 2
+
+        self.ensure(2 * self.LINE)
+        header()
+        for row in rows:
+            cells = [wrap(str(value), width - 8, 9) for value, (_title, width, _align) in zip(row, columns)]
+            height = max(len(lines) for lines in cells) * 11 + 4
+            if self.y - height < MARGIN + 30:
+                self.new_page()
+                header()
+            x = MARGIN
+            for lines, (_title, width, align) in zip(cells, columns):
+                for n, line in enumerate(lines):
+                    self.page.text(x + width - 4 if align == 'right' else x + 4, self.y - 11 * n, line, 9,
+                                   align=align)
+                x += width
+            self.y -= height
+            self.page.line(MARGIN, self.y + 8, PAGE_WIDTH - MARGIN, self.y + 8, 0.25)
+        self.y -= 4
+
+    def render(self):
+        d, page = self.document, self.page
+        page.text(PAGE_WIDTH / 2, self.y - 10, 'Bayo Electronics', 18, BOLD, 'center')
+        page.text(PAGE_WIDTH / 2, self.y - 26, 'Gadget Repair Service', 10, align='center')
+        self.y -= 56
+
+        top = self.y
+        self.pairs([('Receipt #', d['receipt_number']), ('Issued', d['issued']), ('Amount', d['amount_paid'])])
+        bottom, self.y = self.y, top
+        self.pairs([('Trans. Code', d['transaction_code']), ('Brought In', d['brought_in'])], x=PAGE_WIDTH / 2)
+        self.y = min(self.y, bottom)
+
+        self.heading('Device Information')
+        self.pairs(d['device'])
+        self.heading('Customer Information')
+        self.pairs(d['customer'])
+        self.heading('Technician Information')
+        self.pairs([('Technician', d['technician'])])
+
+        self.heading('Repair Details')
+        self.table(
+            [('#', 30, 'left'), ('Issue', 180, 'left'), ('Resolution', 190, 'left'), ('Cost', 95, 'right')],
+            [(n, *item) for n, item in enumerate(d['items'], start=1)],
+        )
+        if d['payments']:
+            self.heading('Payment Breakdown')
+            self.table(
+                [('#', 30, 'left'), ('Method', 95, 'left'), ('Provider / Number', 150, 'left'),
+                 ('Amount', 100, 'right'), ('Date', 120, 'left')],
+                [(n, *payment) for n, payment in enumerate(d['payments'], start=1)],
+            )
+
+        self.ensure(4 * self.LINE)
+        self.y -= 6
+        right = PAGE_WIDTH - MARGIN
+        self.page.text(right, self.y, f"Repair Cost: {d['total_cost']}", 10, align='right')
+        self.y -= self.LINE + 2
+        self.page.text(right, self.y, f"Total Paid: {d['total_paid']}", 12, BOLD, 'right')
+        self.page.text(MARGIN, self.y, 'Thank you! We appreciate your business.', 9)
+
+        for number, page in enumerate(self.pages, start=1):
+            page.text(PAGE_WIDTH / 2, MARGIN - 20, f"{d['receipt_number']} - page {number} of {len(self.pages)}",
+                      8, align='center')
+        return [page.stream() for page in self.pages]
+
+
+def render_receipt(document):
+    """Compressed page streams for one receipt."""
+    return _ReceiptLayout(document).render()
@@ -0,0 +1,160 @@
+"""
+Role permission registry.
+
+The single source of truth for what each role may do. ``MyUser.has_perm``
+and friends resolve against it, and ``manage.py create_groups`` syncs the
+matching auth groups from it, so the two can't drift apart.
+
+At import every permission gets a bit and every role a mask (the OR of its
+permissions' bits); a permission check is then one dict lookup and one AND.
+Superusers/admins bypass the registry entirely (see MyUser.has_perm).
+"""
+from django.db import transaction
+
+
+# role -> (user flag, auth group name)
+ROLES = {
+    'technician': ('is_technician', 'Technician'),
+    'secretary': ('is_secretary', 'Secretary'),
+    'staff': ('is_staff', 'Staff'),
+}
+
+_TECHNICIAN_PERMS = {
+    'repair_shop.view_gadget',
+    'repair_shop.view_gadgetrepairtransaction',
+    'repair_shop.add_gadgetrepairlog',
+    'repair_shop.change_gadgetrepairlog',
+    'repair_shop.view_gadgetrepairlog',
+    'repair_shop.change_gadgetrepairtransaction',
+}
+
+# Groups synced by older versions of create_groups also granted Secretary
+# change_gadgetrepairtransaction and add_gadgetrepairlog. has_perm never did,
+# so secretaries could not use them; a re-sync reports them as removed.
+_SECRETARY_PERMS = {
+    'repair_shop.view_customer', 'repair_shop.add_customer', 'repair_shop.change_customer',
+    'repair_shop.view_gadget', 'repair_shop.add_gadget', 'repair_shop.change_gadget',
+    'repair_shop.view_gadgetrepairtransaction', 'repair_shop.add_gadgetrepairtransaction',
+    # Secretary can VIEW logs (to understand what was done) but cannot ADD or EDIT them.
+    # Adding/editing repair logs is the technician's responsibility.
+    'repair_shop.view_gadgetrepairlog',
+    'repair_shop.add_gadgettransactionreceipt', 'repair_shop.view_gadgettransactionreceipt',
+    'repair_shop.add_payment', 'repair_shop.view_payment',
+    'repair_shop.view_notification',
+}
+
+_STAFF_PERMS = _SECRETARY_PERMS | {
+    'repair_shop.change_gadgetrepairtransaction',
+    'repair_shop.change_gadgetrepairlog',
+    'repair_shop.delete_customer',
+    'repair_shop.delete_gadget',
+    'repair_shop.delete_gadgetrepairlog',
+    'repair_shop.delete_gadgetrepairtransaction',
+    'repair_shop.view_gadgettransactionreceipt',
+    'repair_shop.change_gadgettransactionreceipt',
+    'repair_shop.change_payment', 'repair_shop.delete_payment',
+    'repair_shop.view_notification', 'repair_shop.change_notification',
+}
+
+ROLE_PERMISSIONS = {
+    'technician': frozenset(_TECHNICIAN_PERMS),
+    'secretary': frozenset(_SECRETARY_PERMS),
+    'staff': frozenset(_STAFF_PERMS),
+}
+
+
+# ── compiled form ────────────────────────────────────────────────────────────
+
+PERMISSION_BITS = {
+    perm: 1 << index
+    for index, perm in enumerate(sorted(set().union(*ROLE_PERMISSIONS.values())))
+}
+
+ROLE_MASKS = {
+    role: sum(PERMISSION_BITS[perm] for perm in perms)
+    for role, perms in ROLE_PERMISSIONS.items()
+}
+
+# (user flag, mask) pairs, in the order role_mask() checks them
+FLAG_MASKS = tuple((ROLES[role][0], mask) for role, mask in ROLE_MASKS.items())
+
+
+def _module_masks():
+    masks = {}
+    for perm, bit in PERMISSION_BITS.items():
+        app_label = perm.split('.', 1)[0]
+        masks[app_label] = masks.get(app_label, 0) | bit
+    return masks
+
+
+# app_label -> bits of every registered permission in that app
+MODULE_MASKS = _module_masks()
+
+
+def role_mask(user):
+    """OR of the masks of every role flag set on ``user``."""
+    mask = 0
+    for flag, flag_mask in FLAG_MASKS:
+        if getattr(user, flag):
+            mask |= flag_mask
+    return mask
+
+
+def permissions_mask(perms):
+    """Bits for ``perms``, or None if any of them is not in the registry (never granted)."""
+    mask = 0
+    for perm in perms:
+        bit = PERMISSION_BITS.get(perm)
+        if bit is None:
+            return None
+        mask |= bit
+    return mask
+
+
+def sync_role_groups():
+    """
+    Create/update one auth group per role with exactly the registry's
+    permissions, in a single transaction. Returns {group name: permission
+    count}, the permissions missing from the database (not migrated yet) and
+    {group name: [permissions]} the sync took away from existing groups.
+    """
+    from django.contrib.auth.models import Group, Permission
+
+    names = {role: group for role, (_flag, group) in ROLES.items()}
+    with transaction.atomic():
+        existing = set(Group.objects.filter(name__in=names.values()).values_list('name', flat=True))
+        Group.objects.bulk_create([Group(name=name) for name in names.values() if name not in existing])
+        groups = dict(Group.objects.filter(name__in=names.values()).values_list('name', 'id'))
+
+        permission_ids = {
+            f'{app_label}.{codename}': pk
+            for pk, app_label, codename in Permission.objects.filter(
+                content_type__app_label__in=MODULE_MASKS, codename__in=[p.split('.', 1)[1] for p in PERMISSION_BITS],
+            ).values_list('id', 'content_type__app_label', 'codename')
+        }
+
+        through = Group.permissions.through
+        previous = through.objects.filter(group_id__in=groups.values()).values_list(
+            'group__name', 'permission__content_type__app_label', 'permission__codename',
+        )
+        removed = {}
+        for role, name in names.items():
+            dropped = sorted(
+                f'{app_label}.{codename}' for group, app_label, codename in previous
+                if group == name and f'{app_label}.{codename}' not in ROLE_PERMISSIONS[role]
+            )
+            if dropped:
+                removed[name] = dropped
+        through.objects.filter(group_id__in=groups.values()).delete()
+        rows = [
+            through(group_id=groups[names[role]], permission_id=permission_ids[perm])
+            for role, perms in ROLE_PERMISSIONS.items()
+            for perm in sorted(perms) if perm in permission_ids
+        ]
+        through.objects.bulk_create(rows)
+
+    counts = {
+        names[role]: sum(1 for perm in perms if perm in permission_ids)
+        for role, perms in ROLE_PERMISSIONS.items()
+    }
+    return counts, sorted(set(PERMISSION_BITS) - set(permission_ids)), removed
@@ -0,0 +1,232 @@
+"""
+Mobile-money statement matching.
+
+Providers export statements as CSV (one line per incoming transfer). Each
+line is matched to a recorded mobile-money ``Payment`` by sender number,
+amount and time: the payment's ``created_at`` must be within ``window`` of
+the statement timestamp, and the closest unmatched payment wins.
+
+Payments are indexed into hash buckets keyed by
+``(number, amount in cents, created_at // window)``, so each statement line
+looks at three buckets (its own time slot and the two neighbours) instead of
+scanning every payment. The statement itself is streamed twice (once to find
+its time range, once to match) rather than loaded whole. Memory still grows
+with the number of payments in that range plus one duplicate-check key per
+distinct statement line (a reference, or number, amount and time).
+
+Statement columns are found by header name (case-insensitive); see
+``COLUMN_ALIASES``. The reference column is optional: with it, a repeated
+reference is a duplicate; without it, a repeated (number, amount, time) line is.
+"""
+import csv
+import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.utils import timezone
+
+from .models import Payment
+
+
+MATCHED = 'matched'
+UNMATCHED = 'unmatched'
+DUPLICATE = 'duplicate'
+INVALID = 'invalid'
+
+COLUMN_ALIASES = {
+    'number': ('number', 'mobile_number', 'phone', 'msisdn', 'sender', 'from', 'account'),
+    'amount': ('amount', 'value', 'credit'),
+    'timestamp': ('timestamp', 'date', 'datetime', 'date_time', 'time', 'transaction_date'),
+    'reference': ('reference', 'ref', 'transaction_id', 'txn_id', 'id'),
+}
+
+TIMESTAMP_FORMATS = ('%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M', '%d-%m-%Y %H:%M:%S', '%d-%m-%Y %H:%M')
+
+# Compare the last N digits, so "+220 700 0000", "2207000000" and "7000000" agree
+NUMBER_DIGITS = 7
+
+
+def normalize_number(value, digits=NUMBER_DIGITS):
+    return ''.join(ch for ch in value or '' if ch.isdigit())[-digits:]
+
+
+def parse_amount(value):
+    """Statement amount -> integer cents ("1,250.00", "D 50" and "50" are all fine)."""
+    cleaned = ''.join(ch for ch in value or '' if ch.isdigit() or ch in '.-')
+    try:
+        return int(Decimal(cleaned).quantize(Decimal('0.01')) * 100)
+    except InvalidOperation:
+        raise ValueError(f'invalid amount {value!r}')
+
+
+def parse_timestamp(value, tz=None):
+    value = (value or '').strip()
+    try:
+        parsed = datetime.datetime.fromisoformat(value)
+    except ValueError:
+        for fmt in TIMESTAMP_FORMATS:
+            try:
+                parsed = datetime.datetime.strptime(value, fmt)
+                break
+            except ValueError:
+                continue
+        else:
+            raise ValueError(f'invalid timestamp {value!r}')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, tz or timezone.get_current_timezone())
+    return parsed
+
+
+class StatementLine:
+    __slots__ = ('line_no', 'number', 'amount', 'timestamp', 'reference', 'raw')
+
+    def __init__(self, line_no, number, amount, timestamp, reference, raw):
+        self.line_no = line_no
+        self.number = number
+        self.amount = amount
+        self.timestamp = timestamp
+        self.reference = reference
+        self.raw = raw
+
+    @property
+    def amount_display(self):
+        return Decimal(self.amount) / 100
+
+
+class StatementMatcher:
+    """
+    Match one statement against recorded payments.
+
+    ``open_lines`` is a zero-argument callable returning an iterable of text
+    lines (an open file, a decoded upload); it is called once per pass.
+    ``match()`` yields ``(status, line, payment)`` per statement line, where
+    ``payment`` is a dict for MATCHED lines. Rows that cannot be read come
+    back as ``(INVALID, None, {'line_no': ..., 'error': ...})``.
+    After it is exhausted, ``unmatched_payments()`` lists the payments in the
+    statement's range that no line claimed, and ``counts`` holds the totals.
+    """
+
+    def __init__(self, window=datetime.timedelta(minutes=60), provider=None, number_digits=NUMBER_DIGITS):
+        self.window = window
+        self.provider = provider
+        self.number_digits = number_digits
+        self.counts = {MATCHED: 0, UNMATCHED: 0, DUPLICATE: 0, INVALID: 0}
+        self.range = None
+        self._buckets = {}
+
+    # ── statement parsing ────────────────────────────────────────────────────
+
+    def _columns(self, header):
+        names = [name.strip().lower() for name in header]
+        columns = {}
+        for field, aliases in COLUMN_ALIASES.items():
+            for alias in aliases:
+                if alias in names:
+                    columns[field] = names.index(alias)
+                    break
+        missing = [field for field in ('number', 'amount', 'timestamp') if field not in columns]
+        if missing:
+            raise ValueError(f"Statement is missing column(s): {', '.join(missing)}")
+        return columns
+
+    def _lines(self, open_lines):
+        """Yield StatementLine objects, or (line_no, error) tuples for unreadable rows."""
+        reader = csv.reader(open_lines())
+        header = next(reader, None)
+        if header is None:
+            raise ValueError('Statement is empty')
+        columns = self._columns(header)
+        tz = timezone.get_current_timezone()
+        ref_col = columns.get('reference')
+        for line_no, row in enumerate(reader, start=2):
+            if not any(cell.strip() for cell in row):
+                continue
+            try:
+                number = normalize_number(row[columns['number']], self.number_digits)
+                if not number:
+                    raise ValueError('missing sender number')
+                yield StatementLine(
+                    line_no, number, parse_amount(row[columns['amount']]),
+                    parse_timestamp(row[columns['timestamp']], tz),
+                    row[ref_col].strip() if ref_col is not None and ref_col < len(row) else '',
+                    row,
+                )
+            except (IndexError, ValueError) as exc:
+                yield line_no, str(exc)
+
+    def _scan_range(self, open_lines):
+        start = end = None
+        for line in self._lines(open_lines):
+            if isinstance(line, StatementLine):
+                if start is None or line.timestamp < start:
+                    start = line.timestamp
+                if end is None or line.timestamp > end:
+                    end = line.timestamp
+        return start, end
+
+    # ── payment index ────────────────────────────────────────────────────────
+
+    def _slot(self, moment):
+        return int(moment.timestamp() // self.window.total_seconds())
+
+    def _index_payments(self, start, end):
+        payments = Payment.objects.filter(
+            payment_type=Payment.MOBILE_MONEY,
+            created_at__gte=start - self.window, created_at__lte=end + self.window,
+        ).exclude(mobile_number='')
+        if self.provider:
+            payments = payments.filter(mobile_provider__iexact=self.provider)
+        rows = payments.order_by().values_list(
+            'id', 'mobile_number', 'mobile_provider', 'amount', 'created_at', 'transaction_id', 'transaction__code',
+        )
+        for pk, number, provider, amount, created_at, transaction_id, code in rows.iterator(chunk_size=2000):
+            key = (normalize_number(number, self.number_digits), int(amount * 100), self._slot(created_at))
+            self._buckets.setdefault(key, []).append({
+                'id': pk, 'mobile_number': number, 'mobile_provider': provider, 'amount': amount,
+                'created_at': created_at, 'transaction_id': transaction_id, 'transaction_code': code,
+            })
+
+    def _claim(self, line):
+        """Remove and return the closest payment within the window, if any."""
+        best = best_bucket = None
+        best_gap = self.window
+        slot = self._slot(line.timestamp)
+        for candidate_slot in (slot - 1, slot, slot + 1):
+            bucket = self._buckets.get((line.number, line.amount, candidate_slot))
+            for payment in bucket or ():
+                gap = abs(payment['created_at'] - line.timestamp)
+                if gap <= best_gap:
+                    best, best_bucket, best_gap = payment, bucket, gap
+        if best is not None:
+            best_bucket.remove(best)
+        return best
+
+    # ── matching ─────────────────────────────────────────────────────────────
+
+    def match(self, open_lines):
+        start, end = self._scan_range(open_lines)
+        if start is None:
+            self.range = None
+        else:
+            self.range = (start, end)
+            self._index_payments(start, end)
+
+        seen = set()
+        for line in self._lines(open_lines):
+            if not isinstance(line, StatementLine):
+                self.counts[INVALID] += 1
+                yield INVALID, None, {'line_no': line[0], 'error': line[1]}
+                continue
+            identity = line.reference or (line.number, line.amount, line.timestamp)
+            if identity in seen:
+                self.counts[DUPLICATE] += 1
+                yield DUPLICATE, line, None
+                continue
+            seen.add(identity)
+            payment = self._claim(line)
+            status = MATCHED if payment else UNMATCHED
+            self.counts[status] += 1
+            yield status, line, payment
+
+    def unmatched_payments(self):
+        remaining = [payment for bucket in self._buckets.values() for payment in bucket]
+        return sorted(remaining, key=lambda payment: payment['created_at'])
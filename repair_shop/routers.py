@@ -0,0 +1,85 @@
+"""
+Read-replica routing.
+
+Reads go to the ``default`` database unless a view opts in with
+``@use_replica`` (see decorators.py); inside such a view every read-only
+queryset is sent to the ``settings.REPLICA_DATABASE`` alias. Writes always go
+to ``default``. Without a configured replica alias the router is a no-op.
+
+A replica can lag behind the primary, so:
+  * After a session writes (any non-GET request), ReplicaPinningMiddleware
+    pins it to the primary for ``REPLICA_PIN_SECONDS``, so users always see
+    their own writes.
+  * Cached widgets are always built from the primary (see cache.py): a stale
+    replica read would otherwise be cached under a fresh generation and
+    served until the next write.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+
+_read_from_replica = ContextVar('read_from_replica', default=False)
+
+PIN_SESSION_KEY = '_replica_pinned_until'
+
+
+def replica_alias():
+    """The configured replica alias, or None if no such database is set up."""
+    alias = getattr(settings, 'REPLICA_DATABASE', 'replica')
+    return alias if alias in settings.DATABASES else None
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """Route reads inside the block to the replica (or, with ``enabled=False``, to the primary)."""
+    previous = _read_from_replica.get()
+    _read_from_replica.set(enabled)
+    try:
+        yield
+    finally:
+        _read_from_replica.set(previous)
+
+
+def primary_reads():
+    return replica_reads(False)
+
+
+def iterate_on_replica(iterator):
+    """Keep replica routing for a streaming response consumed after the view returned."""
+    with replica_reads():
+        yield from iterator
+
+
+def pin_to_primary(request):
+    """Send this session's reads to the primary for the next REPLICA_PIN_SECONDS."""
+    if hasattr(request, 'session'):
+        request.session[PIN_SESSION_KEY] = time.time() + getattr(settings, 'REPLICA_PIN_SECONDS', 10)
+
+
+def is_pinned(request):
+    session = getattr(request, 'session', None)
+    return session is not None and session.get(PIN_SESSION_KEY, 0) > time.time()
+
+
+class ReplicaRouter:
+    """Send reads to the replica while replica_reads() is active."""
+
+    def db_for_read(self, model, **hints):
+        if _read_from_replica.get():
+            return replica_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica is a copy of the primary, so objects from either relate freely
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica's schema arrives with its data
+        return db == DEFAULT_DB_ALIAS
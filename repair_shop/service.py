@@ -1,19 +1,52 @@
-from django.db import models
-from .models import Customer, Gadget, GadgetRepairTransaction, GadgetRepairLog, GadgetTransactionReceipt, MyUser, Notification
+import datetime
+import hashlib
+import heapq
+import itertools
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.db import IntegrityError, connections, models, router, transaction as db_transaction
+from django.utils import timezone
+from django.utils.dateformat import format as format_date
+from . import pdf
+from .cache import bump_generation, invalidate_repair_status
+from .models import (
+    Customer, Gadget, GadgetRepairTransaction, GadgetRepairLog, GadgetTransactionReceipt, MyUser, Notification,
+    Payment, RepairStatusEvent, ArchivedRepairTransaction, ArchivedRepairLog, ArchivedPayment, ArchivedReceipt,
+    ArchivedRepairStatusEvent,
+)
 
 
 
 class RepairTransactionService():
 
     @staticmethod
-    def create_repair_transaction(gadget_id,technician_id,status= "Pending"):
+    def create_repair_transaction(gadget_id,technician_id,status= "Pending", changed_by=None):
 
         try:
 
             gadget = Gadget.objects.get(id=gadget_id)
             technician = MyUser.objects.get(id=technician_id)
 
-            transaction_obj = GadgetRepairTransaction.objects.create(gadget=gadget,technician=technician,status=status)
+            transaction_obj = GadgetRepairTransaction(gadget=gadget,technician=technician,status=status)
+            try:
+                transaction_obj.save(changed_by=changed_by)
+            except IntegrityError:
+                # one_active_repair_per_gadget: another active repair exists (or
+                # was just opened). Any other failure is not a conflict.
+                if (status in (GadgetRepairTransaction.PENDING, GadgetRepairTransaction.INPROGRESS)
+                        and gadget.has_active_repair):
+                    return {
+                        "success": False,
+                        "conflict": True,
+                        "message": GadgetRepairTransaction.ACTIVE_REPAIR_ERROR,
+                        "transaction": None
+                    }
+                raise
 
             return {
                 "success": True,
@@ -40,7 +73,7 @@ class RepairTransactionService():
             }
 
     @staticmethod
-    def update_repair_transaction(transaction_id, technician_id, status):
+    def update_repair_transaction(transaction_id, technician_id, status, changed_by=None, expected_status=None):
         """Update only technician and status (NOT gadget)"""
         try:
             transaction_obj = GadgetRepairTransaction.objects.get(id=transaction_id)
@@ -54,9 +87,17 @@ class RepairTransactionService():
                 }
             
             new_technician = MyUser.objects.get(id=technician_id)
-            transaction_obj.technician = new_technician
-            transaction_obj.status = status
-            transaction_obj.save()
+
+            if status != (expected_status or transaction_obj.status):
+                result = RepairTransactionService.change_status(
+                    transaction_obj, status, changed_by=changed_by, expected_status=expected_status,
+                )
+                if not result["success"]:
+                    return result
+
+            if transaction_obj.technician_id != new_technician.id:
+                transaction_obj.technician = new_technician
+                transaction_obj.save(update_fields=['technician', 'updated_at'])
             
             return {
                 "success": True,
@@ -105,7 +146,7 @@ class RepairTransactionService():
             
             old_technician = transaction_obj.technician
             transaction_obj.technician = new_technician
-            transaction_obj.save()
+            transaction_obj.save(update_fields=['technician', 'updated_at'])
             return {
                 "success": True,
                 "message": f"Technician reassigned successfully from {old_technician} to {new_technician}",
@@ -131,6 +172,57 @@ class RepairTransactionService():
             }
 
 
+    @staticmethod
+    def change_status(transaction_obj, new_status, changed_by=None, expected_status=None):
+        """
+        Apply one state-machine transition as a compare-and-set on the status.
+
+        ``expected_status`` is the status the user was looking at; if the row
+        no longer has it (someone else moved the repair meanwhile) nothing is
+        written and the result has "conflict": True.
+        """
+        if expected_status:
+            if expected_status not in dict(GadgetRepairTransaction.STATUS_CHOICES):
+                # A tampered form: nothing to compare against, so report the current status
+                transaction_obj.refresh_from_db()
+                return {
+                    "success": False,
+                    "conflict": True,
+                    "message": f"This repair's status has changed to {transaction_obj.status}. Please review and try again.",
+                    "transaction": transaction_obj
+                }
+            transaction_obj.status = expected_status
+        if new_status == transaction_obj.status:
+            return {
+                "success": False,
+                "conflict": False,
+                "message": f"Repair is already {new_status}",
+                "transaction": transaction_obj
+            }
+        if not transaction_obj.can_transition_to(new_status):
+            allowed = ', '.join(GadgetRepairTransaction.ALLOWED_TRANSITIONS[transaction_obj.status]) or 'none'
+            return {
+                "success": False,
+                "conflict": False,
+                "message": f"Cannot move a repair from {transaction_obj.status} to {new_status} (allowed: {allowed})",
+                "transaction": transaction_obj
+            }
+        if not transaction_obj.transition(new_status, changed_by=changed_by):
+            transaction_obj.refresh_from_db()
+            return {
+                "success": False,
+                "conflict": True,
+                "message": f"This repair was changed to {transaction_obj.status} by someone else. Please review and try again.",
+                "transaction": transaction_obj
+            }
+        return {
+            "success": True,
+            "conflict": False,
+            "message": f"Repair status updated to {new_status}",
+            "transaction": transaction_obj
+        }
+
+
 class GadgetRepairLogService:
 
     @staticmethod
@@ -198,6 +290,114 @@ class GadgetRepairLogService:
                 "repair_log": None
             }
 
+class PaymentService:
+
+    @staticmethod
+    def _lock_repair(transaction_id):
+        """
+        Fetch the repair with its balances while holding its row lock until
+        the surrounding atomic block ends. SQLite has no row locks, so there a
+        no-op UPDATE takes the database write lock first: concurrent postings
+        then queue on busy_timeout instead of reading the same balance.
+        """
+        repairs = GadgetRepairTransaction.objects.all()
+        alias = router.db_for_write(GadgetRepairTransaction)
+        if connections[alias].features.has_select_for_update:
+            repairs = repairs.select_for_update()
+        else:
+            GadgetRepairTransaction.objects.filter(pk=transaction_id).update(status=models.F('status'))
+        return repairs.using(alias).with_balances().get(pk=transaction_id)
+
+    @staticmethod
+    def post_payment(transaction_id, amount, payment_type=Payment.CASH, recorded_by=None,
+                     mobile_provider='', mobile_number='', notes='', idempotency_key=None):
+        """
+        Record a payment against a completed repair.
+
+        The repair row is locked and its balance read once, so two concurrent
+        postings can't both pass the overpayment check. Reposting with an
+        idempotency_key that was already used returns the original payment
+        (``duplicate=True``) instead of recording it again. On success
+        ``balance`` is the outstanding amount after this payment.
+        """
+        try:
+            with db_transaction.atomic():
+                transaction_obj = PaymentService._lock_repair(transaction_id)
+                total_paid = transaction_obj.payments_total
+                balance = transaction_obj.outstanding
+
+                if idempotency_key:
+                    existing = Payment.objects.filter(idempotency_key=idempotency_key).first()
+                    if existing is not None:
+                        return {
+                            "success": True,
+                            "duplicate": True,
+                            "message": f"Payment of D{existing.amount:.2f} was already recorded.",
+                            "payment": existing,
+                            "total_paid": total_paid,
+                            "balance": balance,
+                            "fully_paid": balance <= 0,
+                        }
+
+                error = None
+                if transaction_obj.status != GadgetRepairTransaction.COMPLETED:
+                    error = "Payments can only be recorded for completed repairs."
+                elif transaction_obj.logs_total is None:
+                    error = "No repair cost has been recorded for this repair yet."
+                elif balance <= 0:
+                    error = "This repair is already fully paid."
+                elif amount > balance:
+                    error = f"Payment of D{amount:.2f} exceeds the outstanding balance of D{balance:.2f}."
+                if error:
+                    return {
+                        "success": False,
+                        "message": error,
+                        "payment": None,
+                        "total_paid": total_paid,
+                        "balance": balance,
+                        "fully_paid": transaction_obj.logs_total is not None and balance <= 0,
+                    }
+
+                payment = Payment.objects.create(
+                    transaction=transaction_obj,
+                    amount=amount,
+                    payment_type=payment_type,
+                    mobile_provider=mobile_provider,
+                    mobile_number=mobile_number,
+                    notes=notes,
+                    recorded_by=recorded_by,
+                    idempotency_key=idempotency_key or None,
+                )
+        except GadgetRepairTransaction.DoesNotExist:
+            return {
+                "success": False,
+                "message": "Repair transaction not found",
+                "payment": None,
+            }
+        except IntegrityError:
+            # The same key was posted concurrently against another repair's lock
+            existing = Payment.objects.filter(idempotency_key=idempotency_key).first() if idempotency_key else None
+            if existing is None:
+                raise
+            return {
+                "success": True,
+                "duplicate": True,
+                "message": f"Payment of D{existing.amount:.2f} was already recorded.",
+                "payment": existing,
+            }
+
+        balance -= amount
+        return {
+            "success": True,
+            "duplicate": False,
+            "message": f"Payment of D{amount:.2f} recorded.",
+            "payment": payment,
+            "total_paid": total_paid + amount,
+            "balance": balance,
+            "fully_paid": balance <= 0,
+        }
+
+
 class GadgetTransactionReceiptService:
 
     @staticmethod
@@ -235,11 +435,15 @@ class GadgetTransactionReceiptService:
                     "transaction_receipt": existing
                 }
 
-            # Create receipt — amount_paid = total payments received
-            transaction_receipt_obj = GadgetTransactionReceipt.objects.create(
+            # Create receipt — amount_paid = total payments received.
+            # The snapshot is taken before the INSERT, so it is written with the row.
+            transaction_receipt_obj = GadgetTransactionReceipt(
                 transaction=transaction_obj,
                 amount_paid=transaction_obj.total_paid
             )
+            with db_transaction.atomic():
+                transaction_receipt_obj.freeze()
+                transaction_receipt_obj.save()
             
             return {
                 "success": True,
@@ -260,6 +464,183 @@ class GadgetTransactionReceiptService:
                 "transaction_receipt": None
             }
 
+    @staticmethod
+    def issue_pending_receipts(batch_size=500, attempts=3):
+        """
+        Issue a receipt for every completed, fully paid repair that has none
+        (month-end closing). Each batch is found with one annotated query
+        (awaiting_receipt), gets a contiguous block of receipt numbers and is
+        written with a single bulk INSERT, snapshots included, in its own
+        transaction. If a receipt issued concurrently takes a number from the
+        block, the INSERT fails on receipt_number and the batch is renumbered.
+        """
+        issued = []
+        while True:
+            for attempt in range(attempts):
+                try:
+                    batch = GadgetTransactionReceiptService._issue_batch(batch_size)
+                    break
+                except IntegrityError:
+                    if attempt == attempts - 1:
+                        return {
+                            "success": False,
+                            "message": f"Issued {len(issued)} receipt(s), then receipt numbers kept colliding with "
+                                       f"receipts issued at the same time. Run it again to issue the rest.",
+                            "receipts": issued,
+                        }
+            if not batch:
+                break
+            issued += batch
+
+        if not issued:
+            message = "No completed, fully paid repairs are waiting for a receipt."
+        else:
+            message = (f"Issued {len(issued)} receipt(s), {issued[0].receipt_number} to "
+                       f"{issued[-1].receipt_number}, totalling D{sum(r.amount_paid for r in issued):.2f}.")
+        return {"success": True, "message": message, "receipts": issued}
+
+    @staticmethod
+    def _issue_batch(batch_size):
+        with db_transaction.atomic():
+            repairs = list(GadgetTransactionReceipt.snapshot_queryset(
+                GadgetRepairTransaction.objects.awaiting_receipt()[:batch_size]
+            ))
+            if not repairs:
+                return []
+            numbers = GadgetTransactionReceipt.receipt_number_block(len(repairs))
+            return GadgetTransactionReceipt.objects.bulk_create([
+                GadgetTransactionReceipt(
+                    transaction=repair,
+                    amount_paid=repair.payments_total,
+                    receipt_number=number,
+                    snapshot=GadgetTransactionReceipt.build_snapshot(repair),
+                )
+                for repair, number in zip(repairs, numbers)
+            ])
+
+
+class ReceiptPdfService:
+    """
+    PDF receipts rendered from the frozen snapshots by repair_shop/pdf.py.
+
+    Rendered files are cached on disk under settings.RECEIPT_PDF_CACHE_DIR,
+    named by the SHA-256 of what they show (plus the layout version). A
+    repeated download is then a file read, and a changed receipt or layout
+    simply gets a new file. Nothing is ever invalidated; the directory can be
+    emptied at any time.
+    """
+
+    # Laying out a receipt takes ~0.3 ms and starting the worker processes ~0.25 s,
+    # so smaller batches render in-process
+    POOL_THRESHOLD = 1000
+
+    @staticmethod
+    def document(receipt):
+        """The plain dict render_receipt() lays out, with every value already formatted."""
+        snap = receipt.frozen
+
+        def stamp(value, fmt='M d, Y H:i'):
+            return format_date(timezone.localtime(value), fmt) if value else ''
+
+        device, customer = snap['device'], snap['customer']
+        return {
+            'receipt_number': receipt.receipt_number,
+            'issued': stamp(receipt.issued_date),
+            'amount_paid': f'D{receipt.amount_paid:.2f}',
+            'transaction_code': snap['transaction_code'],
+            'brought_in': stamp(snap['brought_in_date'], 'M d, Y'),
+            'device': [
+                ('Device', f"{device['brand']} {device['model']}".strip()), ('Type', device['type']),
+                ('IMEI', device['imei']), ('Serial #', device['serial']),
+            ],
+            'customer': [
+                ('Name', f"{customer['first_name']} {customer['last_name']}"),
+                ('Phone', customer['phone_number']), ('Email', customer['email']),
+            ],
+            'technician': snap['technician'],
+            'items': [(item['issue'], item['resolution'], f"D{item['cost']:.2f}") for item in snap['items']],
+            'payments': [
+                (p['method'], ' / '.join(part for part in (p['provider'], p['number']) if part) or '-',
+                 f"D{p['amount']:.2f}", stamp(p['date'], 'M d, Y'))
+                for p in snap['payments']
+            ],
+            'total_cost': f"D{snap['total_cost']:.2f}",
+            'total_paid': f'D{receipt.amount_paid:.2f}',
+        }
+
+    @staticmethod
+    def _key(kind, documents):
+        payload = json.dumps([pdf.LAYOUT_VERSION, kind, documents], sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @staticmethod
+    def _cached(key, render):
+        """(path, was_cached) for ``key``, calling ``render()`` for the bytes on a miss."""
+        path = Path(settings.RECEIPT_PDF_CACHE_DIR) / key[:2] / f'{key}.pdf'
+        if path.exists():
+            return path, True
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so a concurrent reader never sees half a file
+        partial = path.with_name(f'{key}.{os.getpid()}.part')
+        partial.write_bytes(render())
+        os.replace(partial, path)
+        return path, False
+
+    @staticmethod
+    def receipt_pdf(receipt):
+        """The PDF of one receipt (which must have a snapshot)."""
+        document = ReceiptPdfService.document(receipt)
+        key = ReceiptPdfService._key('receipt', [document])
+        path, cached = ReceiptPdfService._cached(
+            key, lambda: pdf.build_pdf(pdf.render_receipt(document), title=f'Receipt {receipt.receipt_number}'),
+        )
+        return {"success": True, "message": f"Receipt {receipt.receipt_number}", "path": path, "key": key,
+                "cached": cached}
+
+    @staticmethod
+    def daily_batch_pdf(day, workers=None):
+        """
+        One multi-page PDF of every receipt issued on ``day`` (local time), in
+        issue order. Receipts are laid out in a process pool of ``workers``
+        (default settings.RECEIPT_PDF_WORKERS) and the pages assembled once.
+        """
+        start = timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+        receipts = list(
+            GadgetTransactionReceipt.objects
+            .filter(issued_date__gte=start, issued_date__lt=start + datetime.timedelta(days=1))
+            .only('transaction', 'amount_paid', 'issued_date', 'receipt_number', 'snapshot')
+            .order_by('issued_date', 'id')
+        )
+        if not receipts:
+            return {"success": False, "message": f"No receipts were issued on {day:%b %d, %Y}.", "path": None,
+                    "key": None, "cached": False, "receipts": 0}
+
+        for receipt in receipts:
+            if receipt.snapshot is None:
+                receipt.freeze()
+                receipt.save(update_fields=['snapshot'])
+        documents = [ReceiptPdfService.document(receipt) for receipt in receipts]
+        key = ReceiptPdfService._key('day', documents)
+        path, cached = ReceiptPdfService._cached(key, lambda: pdf.build_pdf(
+            ReceiptPdfService._render_pages(documents, workers), title=f'Receipts {day:%Y-%m-%d}',
+        ))
+        return {"success": True, "message": f"{len(receipts)} receipt(s) issued on {day:%b %d, %Y}.",
+                "path": path, "key": key, "cached": cached, "receipts": len(receipts)}
+
+    @staticmethod
+    def _render_pages(documents, workers=None):
+        if workers is None:
+            workers = settings.RECEIPT_PDF_WORKERS
+        workers = workers or os.cpu_count() or 1
+        if workers <= 1 or len(documents) < ReceiptPdfService.POOL_THRESHOLD:
+            rendered = map(pdf.render_receipt, documents)
+        else:
+            # spawn, not fork: forking a threaded web worker can copy held locks into the children
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+                rendered = list(pool.map(pdf.render_receipt, documents,
+                                         chunksize=max(1, len(documents) // (workers * 4))))
+        return [stream for pages in rendered for stream in pages]
+
 
 class NotificationService:
     """Helper to create in-app notifications."""
@@ -331,3 +712,114 @@ class NotificationService:
         ]
         if notifications:
             Notification.objects.bulk_create(notifications)
+
+
+class ArchiveService:
+    """Moves closed repairs (with logs, payments, receipts and status history) to the archive tables."""
+
+    REPAIR_FIELDS = ['id', 'gadget_id', 'status', 'brought_in_date', 'technician_id', 'code', 'completed_at',
+                     'created_at', 'updated_at', 'logs_total', 'payments_total']
+    LOG_FIELDS = ['id', 'transaction_id', 'repair_date', 'repair_cost', 'issue_description',
+                  'resolution_description', 'created_at', 'updated_at']
+    PAYMENT_FIELDS = ['id', 'transaction_id', 'payment_type', 'amount', 'mobile_provider', 'mobile_number',
+                      'notes', 'recorded_by_id', 'created_at', 'updated_at']
+    RECEIPT_FIELDS = ['id', 'transaction_id', 'amount_paid', 'issued_date', 'receipt_number', 'snapshot']
+    STATUS_EVENT_FIELDS = ['id', 'transaction_id', 'from_status', 'to_status', 'changed_by_id', 'changed_at']
+
+    @staticmethod
+    def archive_closed_repairs(older_than_days=None, batch_size=500, now=None):
+        """
+        Archive completed, fully paid and receipted repairs completed more than
+        ``older_than_days`` ago (default settings.ARCHIVE_AFTER_DAYS).
+        Each batch is copied and deleted in its own transaction, so a failure
+        leaves every repair in exactly one tier and a rerun picks up the rest.
+        """
+        if older_than_days is None:
+            older_than_days = getattr(settings, 'ARCHIVE_AFTER_DAYS', 365)
+        cutoff = (now or timezone.now()) - datetime.timedelta(days=older_than_days)
+
+        archived = 0
+        while True:
+            with db_transaction.atomic():
+                ids = list(
+                    GadgetRepairTransaction.objects.closed(cutoff)
+                    .select_for_update().order_by('id')
+                    .values_list('id', flat=True)[:batch_size]
+                )
+                if ids:
+                    ArchiveService._archive_batch(ids)
+            if not ids:
+                break
+            archived += len(ids)
+
+        return {
+            "success": True,
+            "message": f"Archived {archived} closed repair(s) older than {older_than_days} days.",
+            "archived": archived,
+        }
+
+    @staticmethod
+    def _archive_batch(ids):
+        """Copy one batch of repairs and their children to the archive, then delete the originals."""
+        repairs = list(
+            GadgetRepairTransaction.objects.filter(id__in=ids).with_balances().order_by()
+            .values(*ArchiveService.REPAIR_FIELDS)
+        )
+        ArchivedRepairTransaction.objects.bulk_create([ArchivedRepairTransaction(**row) for row in repairs])
+        children = (
+            (GadgetRepairLog, ArchivedRepairLog, ArchiveService.LOG_FIELDS),
+            (Payment, ArchivedPayment, ArchiveService.PAYMENT_FIELDS),
+            (GadgetTransactionReceipt, ArchivedReceipt, ArchiveService.RECEIPT_FIELDS),
+            (RepairStatusEvent, ArchivedRepairStatusEvent, ArchiveService.STATUS_EVENT_FIELDS),
+        )
+        for model, archive_model, fields in children:
+            rows = model.objects.filter(transaction_id__in=ids).order_by().values(*fields)
+            archive_model.objects.bulk_create([archive_model(**row) for row in rows])
+
+        # One DELETE per table instead of delete()'s cascade, which sends
+        # post_delete (a status-cache lookup and a generation bump) per row.
+        # Notification.repair is SET_NULL, so unlink those first.
+        Notification.objects.filter(repair_id__in=ids).update(repair=None)
+        for model, _archive_model, _fields in children:
+            rows = model.objects.filter(transaction_id__in=ids)
+            rows._raw_delete(rows.db)
+        rows = GadgetRepairTransaction.objects.filter(id__in=ids)
+        rows._raw_delete(rows.db)
+
+        # ...and invalidate once for the whole batch
+        invalidate_repair_status(*(row['code'] for row in repairs))
+        for model in (GadgetRepairTransaction, GadgetRepairLog, Payment):
+            bump_generation(model)
+
+    @staticmethod
+    def repair_history(limit=None, **filters):
+        """
+        Up to ``limit`` repairs from both tiers matching ``filters`` (e.g.
+        gadget=..., or gadget__customer=...), newest first. Each tier is
+        ordered and sliced in SQL and the two sorted pages merged, so at most
+        2 * ``limit`` rows are read however large the archive grows. Live rows
+        carry with_balances() annotations; archived rows have is_archived=True.
+        """
+        order = ('-brought_in_date', '-id')
+        live = (
+            GadgetRepairTransaction.objects.filter(**filters)
+            .select_related('technician').with_balances().order_by(*order)
+        )
+        archived = ArchivedRepairTransaction.objects.filter(**filters).select_related('technician').order_by(*order)
+        if limit is not None:
+            live, archived = live[:limit], archived[:limit]
+        # Archived rows keep their original ids, so (date, id) is unique across tiers
+        newest_first = heapq.merge(
+            live, archived, key=lambda repair: (repair.brought_in_date, repair.id), reverse=True,
+        )
+        return list(itertools.islice(newest_first, limit))
+
+    @staticmethod
+    def repair_status_counts(**filters):
+        """``{status: count}`` over both tiers for repairs matching ``filters``, counted in SQL."""
+        counts = {}
+        for model in (GadgetRepairTransaction, ArchivedRepairTransaction):
+            rows = model.objects.filter(**filters).order_by().values('status').annotate(count=models.Count('id'))
+            for row in rows:
+                counts[row['status']] = counts.get(row['status'], 0) + row['count']
+        return counts
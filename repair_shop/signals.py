@@ -0,0 +1,73 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .backends import invalidate_user_snapshot
+from .cache import bump_generation, invalidate_repair_status
+from .db import configure_sqlite_connection
+from .models import Customer, Gadget, GadgetRepairLog, GadgetRepairTransaction, MyUser, Payment
+
+
+# Models whose writes invalidate cached dashboard widgets
+WIDGET_CACHE_MODELS = (GadgetRepairTransaction, Payment, GadgetRepairLog, Customer, Gadget, MyUser)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def bump_widget_generation(sender, update_fields=None, **kwargs):
+    """Bump the model's cache generation on every save/delete of a tracked model."""
+    if sender not in WIDGET_CACHE_MODELS:
+        return
+    # Logging in only touches last_login, which no widget displays
+    if sender is MyUser and update_fields and set(update_fields) == {'last_login'}:
+        return
+    bump_generation(sender)
+
+
+@receiver(post_save, sender=GadgetRepairTransaction)
+@receiver(post_delete, sender=GadgetRepairTransaction)
+def drop_repair_status(sender, instance, **kwargs):
+    """Saving or deleting (incl. archiving) a repair drops its public status entry."""
+    invalidate_repair_status(instance.code)
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+@receiver(post_save, sender=GadgetRepairLog)
+@receiver(post_delete, sender=GadgetRepairLog)
+def drop_repair_status_on_amount_change(sender, instance, **kwargs):
+    """Payments and price quotes change the amount due shown by the status lookup."""
+    if sender.transaction.is_cached(instance):
+        code = instance.transaction.code
+    else:
+        code = (
+            GadgetRepairTransaction.objects.filter(pk=instance.transaction_id)
+            .values_list('code', flat=True).first()
+        )
+    invalidate_repair_status(code)
+
+
+@receiver(post_save, sender=Customer)
+def drop_repair_status_on_phone_change(sender, instance, created=False, **kwargs):
+    """The status lookup is verified against the customer's phone number."""
+    if created:
+        return
+    invalidate_repair_status(*GadgetRepairTransaction.objects.filter(
+        gadget__customer=instance,
+    ).values_list('code', flat=True))
+
+
+@receiver(post_save, sender=MyUser)
+@receiver(post_delete, sender=MyUser)
+def drop_user_snapshot(sender, instance, update_fields=None, **kwargs):
+    """Any change to a user (profile, role flags, is_active, password) drops its cached snapshot."""
+    # last_login isn't part of the snapshot, so logging in keeps it
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    invalidate_user_snapshot(instance.pk)
+
+
+@receiver(connection_created)
+def tune_sqlite_connection(sender, connection, **kwargs):
+    """Apply settings.SQLITE_PRAGMAS to every new SQLite connection."""
+    configure_sqlite_connection(connection)
@@ -0,0 +1,44 @@
+from django import template
+
+from repair_shop.cache import cached_widget
+
+register = template.Library()
+
+
+class WidgetCacheNode(template.Node):
+    def __init__(self, nodelist, name, models, vary_on):
+        self.nodelist = nodelist
+        self.name = name
+        self.models = models
+        self.vary_on = vary_on
+
+    def render(self, context):
+        name = self.name.resolve(context)
+        models = self.models.resolve(context).split()
+        parts = [var.resolve(context) for var in self.vary_on]
+        return cached_widget(name, models, lambda: self.nodelist.render(context), *parts)
+
+
+@register.tag('widgetcache')
+def do_widgetcache(parser, token):
+    """
+    Cache a rendered dashboard panel until one of its models is written.
+
+    Usage:
+        {% widgetcache "recent_payments" "payment gadgetrepairtransaction" [vary_on ...] %}
+            ... panel markup ...
+        {% endwidgetcache %}
+    """
+    bits = token.split_contents()
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' tag requires a widget name and a space-separated list of models."
+        )
+    nodelist = parser.parse(('endwidgetcache',))
+    parser.delete_first_token()
+    return WidgetCacheNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        parser.compile_filter(bits[2]),
+        [parser.compile_filter(bit) for bit in bits[3:]],
+    )
@@ -1,9 +1,19 @@
+from django.conf import settings
 from django.urls import path
 from django.contrib.auth import views as auth_views
 from . import views
 
 app_name = 'repair_shop'
 
+# Under ASGI (config/asgi.py sets DJANGO_ASYNC_DASHBOARDS) the dashboards issue
+# their independent stat queries concurrently; WSGI keeps the sync views.
+if settings.ASYNC_DASHBOARDS:
+    admin_dashboard_panel_view = views.admin_dashboard_panel_async
+    secretary_dashboard_view = views.secretary_dashboard_async
+else:
+    admin_dashboard_panel_view = views.admin_dashboard_panel
+    secretary_dashboard_view = views.secretary_dashboard
+
 urlpatterns = [
     # ============================================
     # AUTHENTICATION URLS
@@ -23,8 +33,12 @@ urlpatterns = [
     path('dashboard/', views.admin_dashboard, name='admin_dashboard'),
     # Template: repair_shop/admin_dashboard.html
 
+    # Admin Dashboard panels (HTML fragments loaded asynchronously by the dashboard)
+    path('dashboard/panels/<str:panel>/', admin_dashboard_panel_view, name='admin_dashboard_panel'),
+    # Templates: repair_shop/dashboard_panels/admin_<panel>.html
+
     # Secretary Dashboard
-    path('secretary/dashboard/', views.secretary_dashboard, name='secretary_dashboard'),
+    path('secretary/dashboard/', secretary_dashboard_view, name='secretary_dashboard'),
     # Template: repair_shop/secretary_dashboard.html
     
     # ============================================
@@ -134,10 +148,24 @@ urlpatterns = [
     # Receipt Detail
     path('receipts/<int:receipt_id>/', views.receipt_detail, name='receipt_detail'),
     # Template: repair_shop/receipts/receipt_detail.html
+
+    # Receipt Reprint (standalone, long-lived cache headers)
+    path('receipts/<int:receipt_id>/print/', views.receipt_print, name='receipt_print'),
+    # Template: repair_shop/receipts/receipt_print.html
+
+    # Receipt PDF (cached on disk by content hash)
+    path('receipts/<int:receipt_id>/pdf/', views.receipt_pdf, name='receipt_pdf'),
+
+    # Daily Receipt Batch PDF (?date=YYYY-MM-DD)
+    path('receipts/batch.pdf', views.receipt_batch_pdf, name='receipt_batch_pdf'),
     
     # Receipt List
     path('receipts/', views.receipt_list, name='receipt_list'),
     # Template: repair_shop/receipts/receipt_list.html
+
+    # Bulk Receipt Issuing (month-end closing)
+    path('receipts/issue-pending/', views.issue_pending_receipts, name='issue_pending_receipts'),
+    # Template: repair_shop/receipts/issue_pending_receipts.html
     
     # ============================================
     # PAYMENT URLS
@@ -145,6 +173,39 @@ urlpatterns = [
     # Add Payment to a completed repair
     path('repairs/<int:transaction_id>/payment/add/', views.add_payment, name='add_payment'),
 
+    # ============================================
+    # REPORT URLS
+    # ============================================
+    # Accounts-receivable aging (?bucket=KEY drill-down, ?export=csv)
+    path('reports/receivables/', views.receivables_report, name='receivables_report'),
+    # Template: repair_shop/reports/receivables_report.html
+
+    # Daily cash-up by method / provider / cashier (?date_from=&date_to=, ?export=csv)
+    path('reports/cash-up/', views.cash_up_report, name='cash_up_report'),
+    # Template: repair_shop/reports/cash_up_report.html
+
+    # Match a mobile-money provider statement (CSV upload) against recorded payments
+    path('reports/mobile-money/match/', views.match_statement, name='match_statement'),
+    # Template: repair_shop/reports/match_statement.html
+
+    # Analytics time series (JSON): ?granularity=day|week|month&start=YYYY-MM-DD&end=YYYY-MM-DD
+    path('reports/analytics/timeseries/', views.analytics_timeseries, name='analytics_timeseries'),
+
+    # ============================================
+    # PUBLIC REPAIR STATUS URLS (no login)
+    # ============================================
+    # ?code=<repair code>&phone=<last 4 digits>
+    path('status/', views.repair_status, name='repair_status'),
+    # Template: repair_shop/repairs/repair_status.html
+    path('status.json', views.repair_status_json, name='repair_status_json'),
+
+    # ============================================
+    # JSON API URLS (read-only)
+    # ============================================
+    # customers | gadgets | repairs | payments | receipts
+    # ?fields=a,b&limit=N&cursor=TOKEN plus the matching list view's filters
+    path('api/<slug:resource>/', views.api_list, name='api_list'),
+
     # ============================================
     # NOTIFICATION URLS
     # ============================================
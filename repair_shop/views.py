@@ -1,30 +1,49 @@
+import codecs
+import csv
+import datetime
+import hashlib
+import hmac
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
+from django.core.paginator import Paginator
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q, Sum
+from django.db.models import Count, DateField, Max, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
 from django.utils import timezone
-from .models import Customer, Gadget, GadgetRepairTransaction, GadgetRepairLog, GadgetTransactionReceipt, MyUser, Payment, Notification
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from .models import (
+    Customer, Gadget, GadgetRepairTransaction, GadgetRepairLog, GadgetTransactionReceipt, MyUser, Payment, Notification,
+    ArchivedRepairTransaction,
+)
 from .forms import (
     CustomerForm, GadgetForm, GadgetRepairTransactionForm, 
-    GadgetRepairLogForm, ReassignTechnicianForm, GadgetTransactionReceiptForm, PaymentForm
+    GadgetRepairLogForm, ReassignTechnicianForm, GadgetTransactionReceiptForm, PaymentForm,
+    StatementUploadForm,
+)
+from .service import (
+    RepairTransactionService, GadgetRepairLogService, GadgetTransactionReceiptService, NotificationService,
+    ArchiveService, PaymentService, ReceiptPdfService,
 )
-from .service import RepairTransactionService, GadgetRepairLogService, GadgetTransactionReceiptService, NotificationService
-from .decorators import permission_required_or_superuser
+from .decorators import (
+    async_login_required, conditional_page, permission_required_or_superuser, template_version, use_replica,
+)
+from .cache import acached_widget, cached_repair_status, cached_widget, rate_limit_reached, rate_limited
+from .aio import gather_queries
+from .reconciliation import StatementMatcher, normalize_number
+from .api import RESOURCES as API_RESOURCES, ApiError
 
 # ============================================
 # HOME & DASHBOARD VIEWS
 # ============================================
 
-@login_required
-def admin_dashboard(request):
-    """Admin Dashboard — supports ?month=M&year=Y filter for monthly stats."""
-    if not request.user.is_superuser and not request.user.is_staff:
-        messages.error(request, 'You do not have permission to access this page')
-        return redirect('repair_shop:home')
-
-    now = timezone.now()
-
-    # ------ Month/Year filter from GET params ------
+def _dashboard_month_filter(request, now):
+    """Read ?month=M&year=Y, falling back to the current month on bad input."""
     try:
         filter_month = int(request.GET.get('month', now.month))
         filter_year  = int(request.GET.get('year',  now.year))
@@ -36,10 +55,98 @@ def admin_dashboard(request):
     except (ValueError, TypeError):
         filter_month = now.month
         filter_year  = now.year
+    return filter_month, filter_year
 
-    import datetime
-    filter_date = datetime.date(filter_year, filter_month, 1)
-    month_name  = filter_date.strftime('%B %Y')
+
+def _month_bounds(year, month):
+    """[start, end) of a calendar month in the current timezone — range filters can use indexes."""
+    start = timezone.make_aware(datetime.datetime(year, month, 1))
+    end = timezone.make_aware(datetime.datetime(year + month // 12, month % 12 + 1, 1))
+    return start, end
+
+
+# Conditional GET: each detail page's state comes from one query of updated_at
+# maxima and row counts (counts catch deletions, which leave no timestamp)
+# plus the unread-notification count shown in the navbar.
+
+def _latest(model, link, outer='pk'):
+    rows = model.objects.filter(**{link: OuterRef(outer)}).order_by().values(link)
+    return Subquery(rows.annotate(latest=Max('updated_at')).values('latest'))
+
+
+def _count(model, link, outer='pk'):
+    rows = model.objects.filter(**{link: OuterRef(outer)}).order_by().values(link)
+    return Subquery(rows.annotate(n=Count('pk')).values('n'))
+
+
+def _page_state(request, queryset, *fields, **annotations):
+    unread = (
+        Notification.objects.filter(recipient=request.user.pk, is_read=False)
+        .order_by().values('recipient').annotate(n=Count('pk')).values('n')
+    )
+    return (
+        queryset.order_by()
+        .annotate(unread_notifications=Subquery(unread), **annotations)
+        .values(*fields, 'unread_notifications', *annotations)
+        .first()
+    )
+
+
+def _customer_page_state(request, customer_id):
+    return _page_state(
+        request, Customer.objects.filter(pk=customer_id), 'updated_at',
+        gadgets_latest=_latest(Gadget, 'customer'),
+        gadgets_count=_count(Gadget, 'customer'),
+        repairs_latest=_latest(GadgetRepairTransaction, 'gadget__customer'),
+        repairs_count=_count(GadgetRepairTransaction, 'gadget__customer'),
+        archived_count=_count(ArchivedRepairTransaction, 'gadget__customer'),
+    )
+
+
+def _gadget_page_state(request, gadget_id):
+    return _page_state(
+        request, Gadget.objects.filter(pk=gadget_id), 'updated_at', 'customer__updated_at',
+        repairs_latest=_latest(GadgetRepairTransaction, 'gadget'),
+        repairs_count=_count(GadgetRepairTransaction, 'gadget'),
+        logs_latest=_latest(GadgetRepairLog, 'transaction__gadget'),
+        logs_count=_count(GadgetRepairLog, 'transaction__gadget'),
+        archived_count=_count(ArchivedRepairTransaction, 'gadget'),
+    )
+
+
+def _repair_page_state(request, transaction_id):
+    return _page_state(
+        request, GadgetRepairTransaction.objects.filter(pk=transaction_id),
+        'updated_at', 'gadget__updated_at', 'gadget__customer__updated_at', 'technician__updated_at',
+        logs_latest=_latest(GadgetRepairLog, 'transaction'),
+        logs_count=_count(GadgetRepairLog, 'transaction'),
+        payments_latest=_latest(Payment, 'transaction'),
+        payments_count=_count(Payment, 'transaction'),
+        receipts_count=_count(GadgetTransactionReceipt, 'transaction'),
+    )
+
+
+def _receipt_page_state(request, receipt_id):
+    # Receipts render from their frozen snapshot, so only the row itself matters
+    return _page_state(
+        request, GadgetTransactionReceipt.objects.filter(pk=receipt_id),
+        'receipt_number', 'amount_paid', 'issued_date',
+    )
+
+
+@login_required
+def admin_dashboard(request):
+    """
+    Admin Dashboard shell — supports ?month=M&year=Y filter for monthly stats.
+    Only the filter bar and panel frames are rendered here; every panel is
+    fetched in parallel from admin_dashboard_panel once the page has painted.
+    """
+    if not request.user.is_superuser and not request.user.is_staff:
+        messages.error(request, 'You do not have permission to access this page')
+        return redirect('repair_shop:home')
+
+    now = timezone.now()
+    filter_month, filter_year = _dashboard_month_filter(request, now)
 
     # Build month navigation (previous / next)
     if filter_month == 1:
@@ -52,129 +159,227 @@ def admin_dashboard(request):
     else:
         next_month, next_year = filter_month + 1, filter_year
 
-    # ------ All repairs queryset ------
-    all_repairs = GadgetRepairTransaction.objects.select_related(
-        'gadget', 'gadget__customer', 'technician'
-    ).prefetch_related('repair_logs').order_by('-brought_in_date')
+    context = {
+        # Filter controls
+        'filter_month': filter_month,
+        'filter_year': filter_year,
+        'prev_month': prev_month,
+        'prev_year': prev_year,
+        'next_month': next_month,
+        'next_year': next_year,
+        'current_month': now.month,
+        'current_year': now.year,
+        'month_range': range(1, 13),
+        'year_range': range(now.year, 2023, -1),
+    }
+
+    return render(request, 'repair_shop/admin_dashboard.html', context)
 
-    completed_qs   = all_repairs.filter(status=GadgetRepairTransaction.COMPLETED)
-    pending_qs     = all_repairs.filter(status=GadgetRepairTransaction.PENDING)
-    inprogress_qs  = all_repairs.filter(status=GadgetRepairTransaction.INPROGRESS)
+
+def _admin_stats_queries(filter_month, filter_year):
+    """
+    The stats panel's queries as {name: callable}. None depends on another,
+    so the async panel can run them concurrently (see aio.py).
+    """
+    all_repairs = GadgetRepairTransaction.objects.all()
+    completed_qs = all_repairs.filter(status=GadgetRepairTransaction.COMPLETED)
 
     # ------ Filtered month stats ------
     monthly_repairs = all_repairs.filter(
         brought_in_date__year=filter_year,
         brought_in_date__month=filter_month,
     )
-    monthly_pending    = monthly_repairs.filter(status=GadgetRepairTransaction.PENDING)
-    monthly_inprogress = monthly_repairs.filter(status=GadgetRepairTransaction.INPROGRESS)
-
-    # Completed = repairs marked Done in the selected month (by updated_at)
-    monthly_completed = all_repairs.filter(
-        status=GadgetRepairTransaction.COMPLETED,
-        updated_at__year=filter_year,
-        updated_at__month=filter_month,
-    )
 
     # ------ Revenue stats ------
     # Revenue = ACTUAL CASH RECEIVED (payments collected) for COMPLETED repairs only.
     # This gives a true picture of money in the bank from finished work.
-    total_revenue = Payment.objects.filter(
-        transaction__status=GadgetRepairTransaction.COMPLETED
-    ).aggregate(total=Sum('amount'))['total'] or 0
-    monthly_revenue = Payment.objects.filter(
-        transaction__status=GadgetRepairTransaction.COMPLETED,
+    completed_payments = Payment.objects.filter(transaction__status=GadgetRepairTransaction.COMPLETED)
+    monthly_payments = completed_payments.filter(
         created_at__year=filter_year,
         created_at__month=filter_month,
-    ).aggregate(total=Sum('amount'))['total'] or 0
-
-    # Keep payments_received for backward compatibility (same as revenue now)
-    total_payments_received = total_revenue
-    monthly_payments_received = monthly_revenue
-
-    # Monthly completed count (for "Fixed This Month" card)
-    monthly_completed_ids = list(
-        all_repairs.filter(
-            status=GadgetRepairTransaction.COMPLETED,
-            updated_at__year=filter_year,
-            updated_at__month=filter_month,
-        ).values_list('id', flat=True)
     )
 
-    total_customers   = Customer.objects.count()
-    total_technicians = MyUser.objects.filter(is_technician=True).count()
+    # Completed = repairs marked Done in the selected month (by completed_at)
+    month_start, month_end = _month_bounds(filter_year, filter_month)
+
+    return {
+        'total': all_repairs.count,
+        'pending': all_repairs.filter(status=GadgetRepairTransaction.PENDING).count,
+        'in_progress': all_repairs.filter(status=GadgetRepairTransaction.INPROGRESS).count,
+        'completed': completed_qs.count,
+        'total_revenue': lambda: completed_payments.aggregate(total=Sum('amount'))['total'] or 0,
+        'monthly_revenue': lambda: monthly_payments.aggregate(total=Sum('amount'))['total'] or 0,
+        'monthly_received': monthly_repairs.count,
+        'monthly_fixed': completed_qs.filter(completed_at__gte=month_start, completed_at__lt=month_end).count,
+        'monthly_pending': monthly_repairs.filter(status=GadgetRepairTransaction.PENDING).count,
+        'monthly_in_progress': monthly_repairs.filter(status=GadgetRepairTransaction.INPROGRESS).count,
+        'total_customers': Customer.objects.count,
+        'total_technicians': MyUser.objects.filter(is_technician=True).count,
+    }
 
-    monthly_fixed_count = len(monthly_completed_ids)
+
+def _admin_stats_context(now, filter_month, filter_year, results):
+    """Build the stats panel context from the results of _admin_stats_queries."""
+    month_name = datetime.date(filter_year, filter_month, 1).strftime('%B %Y')
+
+    # Keep payments_received for backward compatibility (same as revenue now)
+    total_revenue = results['total_revenue']
+    monthly_revenue = results['monthly_revenue']
 
     # ------ All-time stats ------
     # total_customers is placed INSIDE stats so the template key
     # {{ stats.total_customers }} resolves correctly (was missing before).
     stats = {
-        'total': all_repairs.count(),
-        'pending': pending_qs.count(),
-        'in_progress': inprogress_qs.count(),
-        'completed': completed_qs.count(),
+        'total': results['total'],
+        'pending': results['pending'],
+        'in_progress': results['in_progress'],
+        'completed': results['completed'],
         'total_revenue': total_revenue,
-        'total_payments_received': total_payments_received,
-        'total_customers': total_customers,   # FIX: was only a top-level context var
+        'total_payments_received': total_revenue,
+        'total_customers': results['total_customers'],   # FIX: was only a top-level context var
     }
 
     # Template uses monthly_stats.fixed  (not .completed)
     # Template uses monthly_stats.received (not .total)
     # Both aliases are now provided alongside the original keys.
     monthly_stats = {
-        'total': monthly_repairs.count(),
-        'received': monthly_repairs.count(),    # FIX: template key
-        'completed': monthly_fixed_count,
-        'fixed': monthly_fixed_count,           # FIX: template key
-        'pending': monthly_pending.count(),
-        'in_progress': monthly_inprogress.count(),
+        'total': results['monthly_received'],
+        'received': results['monthly_received'],   # FIX: template key
+        'completed': results['monthly_fixed'],
+        'fixed': results['monthly_fixed'],         # FIX: template key
+        'pending': results['monthly_pending'],
+        'in_progress': results['monthly_in_progress'],
         'revenue': monthly_revenue,
-        'payments_received': monthly_payments_received,
+        'payments_received': monthly_revenue,
         'month_name': month_name,
     }
-
-    # Recent repairs (all statuses, last 10, with payment/log data)
-    recent_repairs = list(
-        all_repairs.prefetch_related('payments', 'repair_logs')[:10]
-    )
-
-    # Recent payments (last 8)
-    recent_payments = Payment.objects.select_related(
-        'transaction', 'transaction__gadget', 'transaction__gadget__customer', 'recorded_by'
-    ).order_by('-created_at')[:8]
-
-    # Awaiting payment: completed repairs with a price but not fully paid
-    completed_with_data = list(
-        completed_qs.prefetch_related('payments', 'repair_logs')[:30]
-    )
-    awaiting_payment = [t for t in completed_with_data if t.has_price and not t.is_fully_paid][:8]
-    recent_completed  = [t for t in completed_with_data if t.is_fully_paid or not t.has_price][:8]
-
-    context = {
+    return {
         'stats': stats,
         'monthly_stats': monthly_stats,
-        'recent_completed': recent_completed,
-        'pending_repairs': pending_qs.select_related('gadget', 'gadget__customer', 'technician')[:8],
-        'awaiting_payment': awaiting_payment,
-        'recent_repairs': recent_repairs,
-        'recent_payments': recent_payments,
-        'total_customers': total_customers,
-        'total_technicians': total_technicians,
-        # Filter controls
+        'total_customers': results['total_customers'],
+        'total_technicians': results['total_technicians'],
         'filter_month': filter_month,
         'filter_year': filter_year,
-        'prev_month': prev_month,
-        'prev_year': prev_year,
-        'next_month': next_month,
-        'next_year': next_year,
         'current_month': now.month,
         'current_year': now.year,
-        'month_range': range(1, 13),
-        'year_range': range(now.year, 2023, -1),
     }
 
-    return render(request, 'repair_shop/admin_dashboard.html', context)
+
+def _admin_stats_panel(now, filter_month, filter_year):
+    """All-time and monthly stat cards."""
+    queries = _admin_stats_queries(filter_month, filter_year)
+    results = {name: query() for name, query in queries.items()}
+    return _admin_stats_context(now, filter_month, filter_year, results)
+
+
+async def _admin_stats_panel_async(now, filter_month, filter_year):
+    """_admin_stats_panel with its independent queries issued concurrently."""
+    results = await gather_queries(_admin_stats_queries(filter_month, filter_year))
+    return _admin_stats_context(now, filter_month, filter_year, results)
+
+
+def _admin_recent_completed_panel(now, filter_month, filter_year):
+    """Completed repairs that are paid (or were never priced)."""
+    return {
+        'recent_completed': GadgetRepairTransaction.objects.select_related(
+            'gadget'
+        ).settled().order_by('-completed_at')[:8],
+    }
+
+
+def _admin_awaiting_payment_panel(now, filter_month, filter_year):
+    """Completed repairs with a price but not fully paid, largest balance first."""
+    return {
+        'awaiting_payment': GadgetRepairTransaction.objects.select_related(
+            'gadget', 'gadget__customer'
+        ).awaiting_payment()[:8],
+    }
+
+
+def _admin_recent_payments_panel(now, filter_month, filter_year):
+    """Last 8 payments."""
+    return {
+        'recent_payments': Payment.objects.select_related(
+            'transaction', 'transaction__gadget', 'transaction__gadget__customer', 'recorded_by'
+        ).order_by('-created_at')[:8],
+    }
+
+
+def _admin_recent_repairs_panel(now, filter_month, filter_year):
+    """Last 10 repairs across all statuses, with payment/log data."""
+    return {
+        'recent_repairs': GadgetRepairTransaction.objects.select_related(
+            'gadget', 'gadget__customer', 'technician'
+        ).prefetch_related('repair_logs', 'payments').order_by('-brought_in_date')[:10],
+    }
+
+
+# Lazily loaded admin dashboard panels.
+# models: writes to these invalidate the cached fragment (see cache.py);
+# ttl: upper bound in seconds on how long an untouched fragment is reused;
+# monthly: fragment depends on the ?month/&year filter;
+# async_builder (optional): coroutine version used by admin_dashboard_panel_async.
+ADMIN_DASHBOARD_PANELS = {
+    'stats': {
+        'builder': _admin_stats_panel,
+        'async_builder': _admin_stats_panel_async,
+        'models': ['gadgetrepairtransaction', 'payment', 'customer', 'myuser'],
+        'ttl': 15 * 60,
+        'monthly': True,
+    },
+    'recent_completed': {
+        'builder': _admin_recent_completed_panel,
+        'models': ['gadgetrepairtransaction', 'gadgetrepairlog', 'payment', 'gadget'],
+        'ttl': 5 * 60,
+        'monthly': False,
+    },
+    'awaiting_payment': {
+        'builder': _admin_awaiting_payment_panel,
+        'models': ['gadgetrepairtransaction', 'gadgetrepairlog', 'payment', 'gadget', 'customer'],
+        'ttl': 5 * 60,
+        'monthly': False,
+    },
+    'recent_payments': {
+        'builder': _admin_recent_payments_panel,
+        'models': ['payment', 'gadgetrepairtransaction', 'gadget', 'customer'],
+        'ttl': 2 * 60,
+        'monthly': False,
+    },
+    'recent_repairs': {
+        'builder': _admin_recent_repairs_panel,
+        'models': ['gadgetrepairtransaction', 'gadgetrepairlog', 'payment', 'gadget', 'customer', 'myuser'],
+        'ttl': 2 * 60,
+        'monthly': False,
+    },
+}
+
+
+@login_required
+@use_replica
+def admin_dashboard_panel(request, panel):
+    """Render a single admin dashboard panel as an HTML fragment."""
+    if not request.user.is_superuser and not request.user.is_staff:
+        messages.error(request, 'You do not have permission to access this page')
+        return redirect('repair_shop:home')
+
+    spec = ADMIN_DASHBOARD_PANELS.get(panel)
+    if spec is None:
+        raise Http404('Unknown dashboard panel')
+
+    now = timezone.now()
+    filter_month, filter_year = _dashboard_month_filter(request, now)
+    vary_on = (filter_year, filter_month, now.year, now.month) if spec['monthly'] else ()
+
+    html = cached_widget(
+        f'admin_panel_{panel}', spec['models'],
+        lambda: render_to_string(
+            f'repair_shop/dashboard_panels/admin_{panel}.html',
+            spec['builder'](now, filter_month, filter_year),
+            request,
+        ),
+        *vary_on, timeout=spec['ttl'],
+    )
+    return HttpResponse(html)
 
 
 @login_required
@@ -195,7 +400,56 @@ def home(request):
         })
 
 
+# Writes to these invalidate the cached secretary stat cards
+SECRETARY_STATS_MODELS = ['gadgetrepairtransaction', 'payment', 'gadgetrepairlog', 'customer']
+
+
+def _secretary_stats_queries(now):
+    """The secretary stat cards' queries as {name: callable}; independent, like _admin_stats_queries."""
+    # All status / this-month counts in a single aggregate query
+    this_month = Q(brought_in_date__year=now.year, brought_in_date__month=now.month)
+    # Half-open month range, so the completed_at index applies
+    month_start, month_end = _month_bounds(now.year, now.month)
+    fixed_this_month = Q(
+        status=GadgetRepairTransaction.COMPLETED,
+        completed_at__gte=month_start,
+        completed_at__lt=month_end,
+    )
+    return {
+        'counts': lambda: GadgetRepairTransaction.objects.aggregate(
+            pending=Count('id', filter=Q(status=GadgetRepairTransaction.PENDING)),
+            in_progress=Count('id', filter=Q(status=GadgetRepairTransaction.INPROGRESS)),
+            completed=Count('id', filter=Q(status=GadgetRepairTransaction.COMPLETED)),
+            received_this_month=Count('id', filter=this_month),
+            fixed_this_month=Count('id', filter=fixed_this_month),
+        ),
+        # Cash collected this month
+        'monthly_cash': lambda: Payment.objects.filter(
+            transaction__status=GadgetRepairTransaction.COMPLETED,
+            created_at__year=now.year,
+            created_at__month=now.month,
+        ).aggregate(total=Sum('amount'))['total'] or 0,
+        'total_customers': Customer.objects.count,
+        'awaiting_payment': GadgetRepairTransaction.objects.awaiting_payment().count,
+    }
+
+
+def _secretary_stats(results):
+    counts = results['counts']
+    return {
+        'pending':             counts['pending'],
+        'in_progress':         counts['in_progress'],
+        'completed':           counts['completed'],
+        'total_customers':     results['total_customers'],
+        'received_this_month': counts['received_this_month'],
+        'fixed_this_month':    counts['fixed_this_month'],
+        'awaiting_payment':    results['awaiting_payment'],
+        'cash_this_month':     results['monthly_cash'],
+    }
+
+
 @login_required
+@use_replica
 def secretary_dashboard(request):
     """Secretary Dashboard — shows operational stats and recent activity."""
     if not request.user.is_secretary and not request.user.is_superuser:
@@ -204,59 +458,95 @@ def secretary_dashboard(request):
 
     now = timezone.now()
 
-    all_repairs = GadgetRepairTransaction.objects.select_related(
-        'gadget', 'gadget__customer', 'technician'
-    ).order_by('-brought_in_date')
-
-    pending_qs    = all_repairs.filter(status=GadgetRepairTransaction.PENDING)
-    inprogress_qs = all_repairs.filter(status=GadgetRepairTransaction.INPROGRESS)
-    completed_qs  = all_repairs.filter(status=GadgetRepairTransaction.COMPLETED)
+    def build_stats():
+        queries = _secretary_stats_queries(now)
+        return _secretary_stats({name: query() for name, query in queries.items()})
 
-    # This month's repairs
-    monthly_repairs = all_repairs.filter(
-        brought_in_date__year=now.year,
-        brought_in_date__month=now.month,
-    )
-    monthly_completed = all_repairs.filter(
-        status=GadgetRepairTransaction.COMPLETED,
-        updated_at__year=now.year,
-        updated_at__month=now.month,
+    stats = cached_widget(
+        'secretary_stats', SECRETARY_STATS_MODELS,
+        build_stats, now.year, now.month,
     )
+    return render(request, 'repair_shop/secretary_dashboard.html', _secretary_dashboard_context(now, stats))
 
-    # Cash collected this month
-    monthly_cash = Payment.objects.filter(
-        transaction__status=GadgetRepairTransaction.COMPLETED,
-        created_at__year=now.year,
-        created_at__month=now.month,
-    ).aggregate(total=Sum('amount'))['total'] or 0
 
-    # Completed repairs — evaluate is_fully_paid in Python (it's a property)
-    completed_list = list(
-        completed_qs.prefetch_related('payments', 'repair_logs').order_by('-updated_at')[:30]
-    )
-    awaiting_payment = [t for t in completed_list if t.has_price and not t.is_fully_paid]
-    recent_completed = [t for t in completed_list if t.is_fully_paid or not t.has_price][:8]
+def _secretary_dashboard_context(now, stats):
+    """Template context for the secretary dashboard; the panel querysets stay lazy."""
+    all_repairs = GadgetRepairTransaction.objects.select_related(
+        'gadget', 'gadget__customer', 'technician'
+    ).order_by('-brought_in_date')
+
+    # Outstanding balances are computed in SQL over ALL completed repairs,
+    # so older unpaid repairs are never missed. Panels stay lazy so cached
+    # {% widgetcache %} fragments skip these queries entirely.
+    awaiting_payment = all_repairs.awaiting_payment()[:8]
+    recent_completed = all_repairs.settled().order_by('-completed_at')[:8]
 
     # Recent repairs across all statuses (last 10)
-    recent_repairs = list(all_repairs.prefetch_related('payments', 'repair_logs')[:10])
+    recent_repairs = all_repairs.prefetch_related('payments', 'repair_logs')[:10]
 
-    context = {
+    return {
         'now': now,
-        'stats': {
-            'pending':             pending_qs.count(),
-            'in_progress':         inprogress_qs.count(),
-            'completed':           completed_qs.count(),
-            'total_customers':     Customer.objects.count(),
-            'received_this_month': monthly_repairs.count(),
-            'fixed_this_month':    monthly_completed.count(),
-            'awaiting_payment':    len(awaiting_payment),
-            'cash_this_month':     monthly_cash,
-        },
+        'stats': stats,
         'recent_repairs':    recent_repairs,
         'recent_completed':  recent_completed,
-        'awaiting_payment':  awaiting_payment[:8],
+        'awaiting_payment':  awaiting_payment,
     }
-    return render(request, 'repair_shop/secretary_dashboard.html', context)
+
+
+# ============================================
+# ASYNC DASHBOARD VIEWS (served under ASGI, see config/asgi.py)
+# ============================================
+# Same pages and cache entries as the sync views above, but the independent
+# stat queries are issued concurrently (aio.gather_queries).
+
+@async_login_required
+@use_replica
+async def admin_dashboard_panel_async(request, panel):
+    """admin_dashboard_panel for ASGI."""
+    if not request.user.is_superuser and not request.user.is_staff:
+        messages.error(request, 'You do not have permission to access this page')
+        return redirect('repair_shop:home')
+
+    spec = ADMIN_DASHBOARD_PANELS.get(panel)
+    if spec is None:
+        raise Http404('Unknown dashboard panel')
+
+    now = timezone.now()
+    filter_month, filter_year = _dashboard_month_filter(request, now)
+    vary_on = (filter_year, filter_month, now.year, now.month) if spec['monthly'] else ()
+
+    async def build():
+        if 'async_builder' in spec:
+            context = await spec['async_builder'](now, filter_month, filter_year)
+        else:
+            # Lazy querysets: evaluated while rendering
+            context = spec['builder'](now, filter_month, filter_year)
+        return await sync_to_async(render_to_string)(
+            f'repair_shop/dashboard_panels/admin_{panel}.html', context, request,
+        )
+
+    html = await acached_widget(f'admin_panel_{panel}', spec['models'], build, *vary_on, timeout=spec['ttl'])
+    return HttpResponse(html)
+
+
+@async_login_required
+@use_replica
+async def secretary_dashboard_async(request):
+    """secretary_dashboard for ASGI."""
+    if not request.user.is_secretary and not request.user.is_superuser:
+        messages.error(request, 'You do not have permission to access this page.')
+        return redirect('repair_shop:home')
+
+    now = timezone.now()
+
+    async def build_stats():
+        return _secretary_stats(await gather_queries(_secretary_stats_queries(now)))
+
+    stats = await acached_widget('secretary_stats', SECRETARY_STATS_MODELS, build_stats, now.year, now.month)
+    return await sync_to_async(render)(
+        request, 'repair_shop/secretary_dashboard.html', _secretary_dashboard_context(now, stats),
+    )
+
 
 # ============================================
 # CUSTOMER VIEWS - SECRETARY & STAFF
@@ -305,6 +595,7 @@ def delete_customer(request, customer_id):
 
 
 @permission_required_or_superuser('repair_shop.view_customer')
+@use_replica
 def customer_list(request):
     """List all customers - Secretary, Staff, Superuser"""
     customers = Customer.objects.all()
@@ -323,19 +614,23 @@ def customer_list(request):
 
 
 @permission_required_or_superuser('repair_shop.view_customer')
+@conditional_page(_customer_page_state)
 def customer_detail(request, customer_id):
     """View customer details - Secretary, Staff, Superuser"""
     customer = get_object_or_404(Customer, id=customer_id)
     
-    # Get all gadgets for this customer
-    customer_gadgets = Gadget.objects.filter(customer=customer)
+    # Get all gadgets for this customer, with repair counts across live and archived repairs
+    customer_gadgets = Gadget.objects.filter(customer=customer).annotate(
+        repair_count=Count('gadgetrepairtransaction', distinct=True) + Count('archived_repairs', distinct=True),
+    )
     
-    # Get all repairs for this customer
+    # Get all repairs for this customer (archived repairs are all completed)
     all_repairs = GadgetRepairTransaction.objects.filter(gadget__customer=customer)
-    total_repairs = all_repairs.count()
+    archived_repairs = ArchivedRepairTransaction.objects.filter(gadget__customer=customer).count()
+    total_repairs = all_repairs.count() + archived_repairs
     pending_repairs = all_repairs.filter(status=GadgetRepairTransaction.PENDING).count()
     inprogress_repairs = all_repairs.filter(status=GadgetRepairTransaction.INPROGRESS).count()
-    completed_repairs = all_repairs.filter(status=GadgetRepairTransaction.COMPLETED).count()
+    completed_repairs = all_repairs.filter(status=GadgetRepairTransaction.COMPLETED).count() + archived_repairs
     
     return render(request, 'repair_shop/customers/customer_detail.html', {
         'customer': customer,
@@ -394,6 +689,7 @@ def delete_gadget(request, gadget_id):
 
 
 @permission_required_or_superuser('repair_shop.view_gadget')
+@use_replica
 def gadget_list(request):
     """List all gadgets - Secretary, Staff, Technician, Superuser"""
     gadgets = Gadget.objects.select_related('customer').all()
@@ -412,21 +708,29 @@ def gadget_list(request):
     return render(request, 'repair_shop/gadgets/gadget_list.html', {'gadgets': gadgets})
 
 
+# Repairs listed on the gadget page; the statistics still count all of them
+GADGET_HISTORY_LIMIT = 50
+
+
 @permission_required_or_superuser('repair_shop.view_gadget')
+@conditional_page(_gadget_page_state)
 def gadget_detail(request, gadget_id):
     """View gadget details and repair history - Secretary, Staff, Technician, Superuser"""
     gadget = get_object_or_404(Gadget, id=gadget_id)
-    repair_history = GadgetRepairTransaction.objects.filter(gadget=gadget).order_by('-brought_in_date')
+    # Live and archived repairs, newest first
+    repair_history = ArchiveService.repair_history(limit=GADGET_HISTORY_LIMIT, gadget=gadget)
     
     # Calculate statistics
-    total_repairs = repair_history.count()
-    pending_repairs = repair_history.filter(status=GadgetRepairTransaction.PENDING).count()
-    inprogress_repairs = repair_history.filter(status=GadgetRepairTransaction.INPROGRESS).count()
-    completed_repairs = repair_history.filter(status=GadgetRepairTransaction.COMPLETED).count()
+    status_counts = ArchiveService.repair_status_counts(gadget=gadget)
+    total_repairs = sum(status_counts.values())
+    pending_repairs = status_counts.get(GadgetRepairTransaction.PENDING, 0)
+    inprogress_repairs = status_counts.get(GadgetRepairTransaction.INPROGRESS, 0)
+    completed_repairs = status_counts.get(GadgetRepairTransaction.COMPLETED, 0)
     
     return render(request, 'repair_shop/gadgets/gadget_detail.html', {
         'gadget': gadget,
         'repair_history': repair_history,
+        'history_limit': GADGET_HISTORY_LIMIT,
         'total_repairs': total_repairs,
         'pending_repairs': pending_repairs,
         'inprogress_repairs': inprogress_repairs,
@@ -455,7 +759,8 @@ def create_repair_transaction(request):
             result = RepairTransactionService.create_repair_transaction(
                 gadget_id=gadget.id,
                 technician_id=technician.id,
-                status=status
+                status=status,
+                changed_by=request.user,
             )
             
             if result['success']:
@@ -463,6 +768,9 @@ def create_repair_transaction(request):
                 # Notify the assigned technician
                 NotificationService.notify_technician_assigned(result['transaction'])
                 return redirect('repair_shop:repair_transaction_detail', transaction_id=result['transaction'].id)
+            elif result.get('conflict'):
+                # The gadget already has an active repair
+                form.add_error(None, result['message'])
             else:
                 messages.error(request, result['message'])
     else:
@@ -474,6 +782,7 @@ def create_repair_transaction(request):
 
 
 @permission_required_or_superuser('repair_shop.view_gadgetrepairtransaction')
+@conditional_page(_repair_page_state)
 def repair_transaction_detail(request, transaction_id):
     """View repair transaction details with all logs - All logged in users"""
     transaction = get_object_or_404(GadgetRepairTransaction, id=transaction_id)
@@ -499,6 +808,7 @@ def repair_transaction_detail(request, transaction_id):
 
 
 @permission_required_or_superuser('repair_shop.view_gadgetrepairtransaction')
+@use_replica
 def repair_transaction_list(request):
     """
     List all repair transactions.
@@ -597,6 +907,7 @@ def repair_transaction_list(request):
 
 
 @permission_required_or_superuser('repair_shop.view_gadgetrepairtransaction')
+@use_replica
 def my_assigned_repairs(request):
     """View technician's assigned repairs - Technician Only"""
     repairs = GadgetRepairTransaction.objects.filter(
@@ -616,6 +927,7 @@ def my_assigned_repairs(request):
 
 
 @login_required
+@use_replica
 def technician_dashboard(request):
     """Technician Dashboard - Shows assigned gadgets/repairs with detailed status"""
     # Allow technicians and superusers to access
@@ -677,11 +989,19 @@ def technician_update_status(request, transaction_id):
                           GadgetRepairTransaction.INPROGRESS, 
                           GadgetRepairTransaction.COMPLETED]
         
-        if new_status in valid_statuses:
-            old_status = transaction.status
-            transaction.status = new_status
-            transaction.save()
-            
+        if new_status not in valid_statuses:
+            messages.error(request, 'Invalid status selected')
+        else:
+            # The status the technician saw when the form was rendered
+            old_status = request.POST.get('expected_status') or transaction.status
+            result = RepairTransactionService.change_status(
+                transaction, new_status, changed_by=request.user, expected_status=old_status,
+            )
+            if not result['success']:
+                messages.error(request, result['message'])
+                # Show the form again with the status as it is now
+                return redirect('repair_shop:technician_update_status', transaction_id=transaction.id)
+
             status_display = dict(GadgetRepairTransaction.STATUS_CHOICES).get(new_status, new_status)
             messages.success(request, f'Repair status updated from {old_status} to {status_display}')
             
@@ -696,11 +1016,10 @@ def technician_update_status(request, transaction_id):
                     messages.info(request, 'Repair marked as completed! Admin has been notified.')
             
             return redirect('repair_shop:technician_dashboard')
-        else:
-            messages.error(request, 'Invalid status selected')
-    
+
     return render(request, 'repair_shop/repairs/technician_update_status.html', {
-        'transaction': transaction
+        'transaction': transaction,
+        'allowed_statuses': GadgetRepairTransaction.ALLOWED_TRANSITIONS[transaction.status],
     })
 
 
@@ -718,7 +1037,9 @@ def update_repair_transaction(request, transaction_id):
             result = RepairTransactionService.update_repair_transaction(
                 transaction_id=transaction_id,
                 technician_id=technician.id,
-                status=status
+                status=status,
+                changed_by=request.user,
+                expected_status=request.POST.get('expected_status'),
             )
             
             if result['success']:
@@ -925,19 +1246,124 @@ def create_transaction_receipt(request, transaction_id):
     })
 
 
+# Repairs listed on the bulk-issue page before it is confirmed
+PENDING_RECEIPT_PREVIEW_LIMIT = 50
+
+
+@permission_required_or_superuser('repair_shop.add_gadgettransactionreceipt')
+def issue_pending_receipts(request):
+    """Issue receipts for all completed, fully paid repairs at once (month-end closing)."""
+    if request.method == 'POST':
+        result = GadgetTransactionReceiptService.issue_pending_receipts()
+        if result['success']:
+            messages.success(request, result['message'])
+        else:
+            messages.error(request, result['message'])
+        return redirect('repair_shop:receipt_list')
+
+    pending = GadgetRepairTransaction.objects.awaiting_receipt()
+    summary = pending.order_by().aggregate(repairs=Count('id'), total=Sum('payments_total'))
+    preview = pending.select_related('gadget__customer')[:PENDING_RECEIPT_PREVIEW_LIMIT]
+    return render(request, 'repair_shop/receipts/issue_pending_receipts.html', {
+        'summary': summary,
+        'preview': preview,
+        'preview_limit': PENDING_RECEIPT_PREVIEW_LIMIT,
+    })
+
+
+# Reprints never change, so browsers may keep them for a year without revalidating
+RECEIPT_REPRINT_MAX_AGE = 60 * 60 * 24 * 365
+
+
+def _frozen_receipt(receipt_id):
+    """
+    The receipt row and its snapshot in one primary-key read; nothing else is
+    queried to render it. Receipts issued before snapshots existed are frozen
+    on first view.
+    """
+    receipt = get_object_or_404(
+        GadgetTransactionReceipt.objects.only('transaction', 'amount_paid', 'issued_date', 'receipt_number', 'snapshot'),
+        id=receipt_id,
+    )
+    if receipt.snapshot is None:
+        receipt.freeze()
+        receipt.save(update_fields=['snapshot'])
+    return receipt
+
+
 @permission_required_or_superuser('repair_shop.view_gadgettransactionreceipt')
+@conditional_page(_receipt_page_state)
 def receipt_detail(request, receipt_id):
     """View a specific receipt - Staff, Superuser"""
-    receipt = get_object_or_404(GadgetTransactionReceipt, id=receipt_id)
-    transaction = receipt.transaction
-    
+    receipt = _frozen_receipt(receipt_id)
+
     return render(request, 'repair_shop/receipts/receipt_detail.html', {
         'receipt': receipt,
-        'transaction': transaction
+        'snap': receipt.frozen,
     })
 
 
 @permission_required_or_superuser('repair_shop.view_gadgettransactionreceipt')
+def receipt_print(request, receipt_id):
+    """Standalone printable receipt (reprints) - Staff, Superuser"""
+    receipt = _frozen_receipt(receipt_id)
+    fingerprint = repr((receipt.receipt_number, str(receipt.amount_paid), receipt.issued_date, template_version()))
+    etag = quote_etag(hashlib.md5(fingerprint.encode() + bytes(receipt.snapshot)).hexdigest())
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        # Rendered without the request: nothing user-specific, and no context processor queries
+        response = HttpResponse(render_to_string('repair_shop/receipts/receipt_print.html', {
+            'receipt': receipt,
+            'snap': receipt.frozen,
+        }))
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, max_age=RECEIPT_REPRINT_MAX_AGE, immutable=True)
+    return response
+
+
+@permission_required_or_superuser('repair_shop.view_gadgettransactionreceipt')
+def receipt_pdf(request, receipt_id):
+    """PDF of a receipt, served from the on-disk cache after the first download - Staff, Superuser"""
+    receipt = _frozen_receipt(receipt_id)
+    result = ReceiptPdfService.receipt_pdf(receipt)
+    etag = quote_etag(result['key'])
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = FileResponse(open(result['path'], 'rb'), content_type='application/pdf',
+                                filename=f'{receipt.receipt_number}.pdf')
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, max_age=RECEIPT_REPRINT_MAX_AGE, immutable=True)
+    return response
+
+
+@permission_required_or_superuser('repair_shop.view_gadgettransactionreceipt')
+def receipt_batch_pdf(request):
+    """All receipts issued on ?date=YYYY-MM-DD (default today) as one PDF, for print runs - Staff, Superuser"""
+    try:
+        day = datetime.date.fromisoformat(request.GET.get('date', ''))
+    except ValueError:
+        day = timezone.localdate()
+
+    result = ReceiptPdfService.daily_batch_pdf(day)
+    if not result['success']:
+        messages.info(request, result['message'])
+        return redirect('repair_shop:receipt_list')
+
+    etag = quote_etag(result['key'])
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = FileResponse(open(result['path'], 'rb'), content_type='application/pdf', as_attachment=True,
+                                filename=f'receipts-{day:%Y-%m-%d}.pdf')
+    response['ETag'] = etag
+    # Today's batch grows as receipts are issued, so browsers must revalidate
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@permission_required_or_superuser('repair_shop.view_gadgettransactionreceipt')
+@use_replica
 def receipt_list(request):
     """List all transaction receipts - Staff, Superuser"""
     receipts = GadgetTransactionReceipt.objects.select_related('transaction', 'transaction__gadget', 'transaction__gadget__customer').order_by('-issued_date')
@@ -969,8 +1395,9 @@ def user_profile(request, user_id=None):
             return redirect('repair_shop:home')
         user_obj = get_object_or_404(MyUser, id=user_id)
     else:
-        # Viewing own profile
-        user_obj = request.user
+        # Viewing own profile. request.user is a cached snapshot with deferred
+        # fields (see backends.py), so edit a fully loaded copy.
+        user_obj = get_object_or_404(MyUser, id=request.user.id)
     
     from .forms import UserProfileForm
     if request.method == 'POST':
@@ -1110,7 +1537,7 @@ def delete_user(request, user_id):
 @permission_required_or_superuser('repair_shop.add_payment')
 def add_payment(request, transaction_id):
     """Record a cash or mobile-money payment against a completed repair."""
-    transaction = get_object_or_404(GadgetRepairTransaction, id=transaction_id)
+    transaction = get_object_or_404(GadgetRepairTransaction.objects.with_balances(), id=transaction_id)
 
     # Only allow payments on completed repairs
     if transaction.status != GadgetRepairTransaction.COMPLETED:
@@ -1118,7 +1545,7 @@ def add_payment(request, transaction_id):
         return redirect('repair_shop:repair_transaction_detail', transaction_id=transaction_id)
 
     # If already fully paid, redirect
-    if transaction.is_fully_paid:
+    if transaction.logs_total is not None and transaction.outstanding <= 0:
         messages.warning(request, 'This repair is already fully paid. Generate the receipt instead.')
         return redirect('repair_shop:repair_transaction_detail', transaction_id=transaction_id)
 
@@ -1127,38 +1554,560 @@ def add_payment(request, transaction_id):
     if request.method == 'POST':
         form = PaymentForm(request.POST)
         if form.is_valid():
-            payment = form.save(commit=False)
-            payment.transaction = transaction
-            payment.recorded_by = request.user
-            payment.save()
-
-            remaining = transaction.total_due  # recalculated after save
-            if transaction.is_fully_paid:
-                messages.success(
-                    request,
-                    f'Payment of D{payment.amount:.2f} recorded. '
-                    f'Repair is now FULLY PAID! You can now generate a receipt.'
-                )
-            else:
-                messages.success(
-                    request,
-                    f'Payment of D{payment.amount:.2f} recorded. '
-                    f'Outstanding balance: D{remaining:.2f}'
-                )
-            return redirect('repair_shop:repair_transaction_detail', transaction_id=transaction_id)
+            data = form.cleaned_data
+            result = PaymentService.post_payment(
+                transaction.id,
+                amount=data['amount'],
+                payment_type=data['payment_type'],
+                mobile_provider=data['mobile_provider'],
+                mobile_number=data['mobile_number'],
+                notes=data['notes'],
+                recorded_by=request.user,
+                idempotency_key=data['idempotency_key'],
+            )
+            if result['success']:
+                if result['duplicate']:
+                    messages.info(request, result['message'])
+                elif result['fully_paid']:
+                    messages.success(
+                        request,
+                        f'{result["message"]} Repair is now FULLY PAID! You can now generate a receipt.'
+                    )
+                else:
+                    messages.success(
+                        request,
+                        f'{result["message"]} Outstanding balance: D{result["balance"]:.2f}'
+                    )
+                return redirect('repair_shop:repair_transaction_detail', transaction_id=transaction_id)
+            form.add_error(None, result['message'])
     else:
-        form = PaymentForm(initial={'amount': transaction.total_due})
+        form = PaymentForm(initial={'amount': transaction.outstanding})
 
     return render(request, 'repair_shop/payments/add_payment.html', {
         'form': form,
         'transaction': transaction,
-        'total_cost': transaction.total_cost,
-        'total_paid': transaction.total_paid,
-        'total_due': transaction.total_due,
+        'total_cost': transaction.logs_total or 0,
+        'total_paid': transaction.payments_total,
+        'total_due': transaction.outstanding,
         'payments': payments,
     })
 
 
+# ============================================
+# REPORT VIEWS - STAFF & SUPERUSER
+# ============================================
+
+class _Echo:
+    """File-like object whose write() just returns the line, for streaming CSV."""
+
+    def write(self, value):
+        return value
+
+
+@login_required
+@use_replica
+def receivables_report(request):
+    """
+    Accounts-receivable aging report.
+    ?bucket=KEY drills down into one aging band, ?export=csv downloads the
+    (optionally filtered) list as CSV.
+    """
+    if not request.user.is_superuser and not request.user.is_staff:
+        messages.error(request, 'You do not have permission to access this page')
+        return redirect('repair_shop:home')
+
+    now = timezone.now()
+    buckets = GadgetRepairTransaction.objects.receivables_aging(now)
+    bucket_labels = {b['key']: b['label'] for b in buckets}
+
+    selected_bucket = request.GET.get('bucket', '')
+    if selected_bucket not in bucket_labels:
+        selected_bucket = ''
+
+    receivables = GadgetRepairTransaction.objects.awaiting_payment().with_age_bucket(now)
+    if selected_bucket:
+        receivables = receivables.filter(age_bucket=selected_bucket)
+
+    if request.GET.get('export') == 'csv':
+        return _receivables_csv_response(receivables, now, selected_bucket)
+
+    receivables = receivables.select_related('gadget', 'gadget__customer', 'technician')
+    page_obj = Paginator(receivables, 50).get_page(request.GET.get('page'))
+
+    return render(request, 'repair_shop/reports/receivables_report.html', {
+        'now': now,
+        'buckets': buckets,
+        'total_outstanding': sum(b['outstanding_total'] for b in buckets),
+        'total_repairs': sum(b['repairs'] for b in buckets),
+        'selected_bucket': selected_bucket,
+        'selected_bucket_label': bucket_labels.get(selected_bucket, ''),
+        'page_obj': page_obj,
+    })
+
+
+def _receivables_csv_response(receivables, now, bucket=''):
+    """Stream receivables as CSV without instantiating model objects."""
+    rows = receivables.values_list(
+        'code', 'gadget__customer__first_name', 'gadget__customer__last_name',
+        'gadget__customer__phone_number', 'gadget__gadget_brand', 'gadget__gadget_model',
+        'technician__username', 'completed_at', 'age_bucket',
+        'logs_total', 'payments_total', 'outstanding',
+    )
+
+    def generate():
+        writer = csv.writer(_Echo())
+        yield writer.writerow([
+            'Code', 'Customer', 'Phone', 'Device', 'Technician', 'Completed',
+            'Age (days)', 'Aging Band', 'Total Cost', 'Total Paid', 'Outstanding',
+        ])
+        for (code, first, last, phone, brand, model, tech, completed, band,
+             cost, paid, outstanding) in rows.iterator(chunk_size=2000):
+            yield writer.writerow([
+                code, f'{first} {last}', phone or '', f'{brand} {model or ""}'.strip(),
+                tech or '', completed.strftime('%Y-%m-%d'), (now - completed).days, band,
+                f'{cost:.2f}', f'{paid:.2f}', f'{outstanding:.2f}',
+            ])
+
+    filename = f"receivables-{now:%Y-%m-%d}{'-' + bucket if bucket else ''}.csv"
+    response = StreamingHttpResponse(generate(), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+# Longest range one cash-up page or export may cover
+CASH_UP_MAX_DAYS = 366
+
+
+@login_required
+@use_replica
+def cash_up_report(request):
+    """
+    Daily cash-up for reconciling the drawer and mobile-money accounts.
+    Payments per day, method, mobile provider and cashier for
+    ?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD (default: today);
+    ?export=csv downloads the same rows.
+    """
+    if not request.user.is_superuser and not request.user.is_staff:
+        messages.error(request, 'You do not have permission to access this page')
+        return redirect('repair_shop:home')
+
+    today = timezone.localdate()
+    try:
+        date_to = datetime.date.fromisoformat(request.GET.get('date_to') or today.isoformat())
+        date_from = datetime.date.fromisoformat(request.GET.get('date_from') or date_to.isoformat())
+        # Also keeps date_to + 1 day representable
+        if not all(2000 <= day.year <= today.year + 1 for day in (date_from, date_to)):
+            raise ValueError('date out of range')
+    except ValueError:
+        messages.error(request, 'Dates must be in YYYY-MM-DD format.')
+        date_from = date_to = today
+    if date_from > date_to:
+        date_from, date_to = date_to, date_from
+    if (date_to - date_from).days >= CASH_UP_MAX_DAYS:
+        messages.error(request, f'A cash-up covers at most {CASH_UP_MAX_DAYS} days; showing the last {CASH_UP_MAX_DAYS}.')
+        date_from = date_to - datetime.timedelta(days=CASH_UP_MAX_DAYS - 1)
+
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.datetime.combine(date_from, datetime.time.min), tz)
+    end = timezone.make_aware(datetime.datetime.combine(date_to + datetime.timedelta(days=1), datetime.time.min), tz)
+    rows = list(Payment.objects.cash_up(start, end))
+
+    if request.GET.get('export') == 'csv':
+        return _cash_up_csv_response(rows, date_from, date_to)
+
+    # Day subtotals and grand totals per method, from the grouped rows
+    type_labels = dict(Payment.PAYMENT_TYPE_CHOICES)
+    days = []
+    totals = {'payments': 0, 'total': 0, 'by_type': {key: 0 for key in type_labels}}
+    for row in rows:
+        row['payment_type_label'] = type_labels.get(row['payment_type'], row['payment_type'])
+        if not days or days[-1]['day'] != row['day']:
+            days.append({'day': row['day'], 'rows': [], 'payments': 0, 'total': 0,
+                         'by_type': {key: 0 for key in type_labels}})
+        day = days[-1]
+        day['rows'].append(row)
+        for bucket in (day, totals):
+            bucket['payments'] += row['payments']
+            bucket['total'] += row['total']
+            bucket['by_type'][row['payment_type']] = bucket['by_type'].get(row['payment_type'], 0) + row['total']
+
+    return render(request, 'repair_shop/reports/cash_up_report.html', {
+        'date_from': date_from,
+        'date_to': date_to,
+        'days': days,
+        'totals': totals,
+        'cash_total': totals['by_type'].get(Payment.CASH, 0),
+        'mobile_total': totals['by_type'].get(Payment.MOBILE_MONEY, 0),
+    })
+
+
+def _cash_up_csv_response(rows, date_from, date_to):
+    """The grouped cash-up rows as CSV (one line per day/method/provider/cashier)."""
+    type_labels = dict(Payment.PAYMENT_TYPE_CHOICES)
+    filename = f'cash-up-{date_from:%Y-%m-%d}'
+    if date_to != date_from:
+        filename += f'-to-{date_to:%Y-%m-%d}'
+    response = HttpResponse(content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    writer = csv.writer(response)
+    writer.writerow(['Date', 'Payment Method', 'Mobile Provider', 'Recorded By', 'Payments', 'Total'])
+    for row in rows:
+        writer.writerow([
+            row['day'].isoformat(), type_labels.get(row['payment_type'], row['payment_type']),
+            row['mobile_provider'], row['recorded_by__username'] or '', row['payments'], f"{row['total']:.2f}",
+        ])
+    return response
+
+
+# Statement lines listed per result on the matching page (the counts cover all)
+STATEMENT_MATCH_DISPLAY_LIMIT = 200
+
+
+@login_required
+def match_statement(request):
+    """
+    Upload a mobile-money provider statement and match its lines to recorded
+    payments (see reconciliation.py). Large statements are better run with
+    ``manage.py match_statement --output``, which writes every line's result.
+    """
+    if not request.user.is_superuser and not request.user.is_staff:
+        messages.error(request, 'You do not have permission to access this page')
+        return redirect('repair_shop:home')
+
+    results = None
+    if request.method == 'POST':
+        form = StatementUploadForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data['statement']
+            matcher = StatementMatcher(
+                window=datetime.timedelta(minutes=form.cleaned_data['window_minutes']),
+                provider=form.cleaned_data['provider'] or None,
+            )
+
+            def open_lines():
+                upload.seek(0)
+                return codecs.iterdecode(upload, 'utf-8-sig')
+
+            lines = {status: [] for status in matcher.counts}
+            try:
+                for status, line, payment in matcher.match(open_lines):
+                    if len(lines[status]) < STATEMENT_MATCH_DISPLAY_LIMIT:
+                        lines[status].append({'line': line, 'payment': payment})
+            except (ValueError, UnicodeDecodeError) as exc:
+                form.add_error('statement', str(exc))
+            else:
+                unmatched_payments = matcher.unmatched_payments()
+                results = {
+                    'counts': matcher.counts,
+                    'range': matcher.range,
+                    'lines': lines,
+                    'unmatched_payments': unmatched_payments[:STATEMENT_MATCH_DISPLAY_LIMIT],
+                    'unmatched_payment_count': len(unmatched_payments),
+                }
+    else:
+        form = StatementUploadForm()
+
+    return render(request, 'repair_shop/reports/match_statement.html', {
+        'form': form,
+        'results': results,
+        'display_limit': STATEMENT_MATCH_DISPLAY_LIMIT,
+    })
+
+
+# Bucket truncation per granularity for the analytics time series
+TIMESERIES_TRUNC = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+# Most buckets one request may ask for, per granularity (about a year of days,
+# ten years of weeks, twenty years of months)
+TIMESERIES_MAX_BUCKETS = {
+    'day': 366,
+    'week': 520,
+    'month': 240,
+}
+
+
+def _timeseries_bucket_count(granularity, start, end):
+    """How many buckets start..end spans, without building them."""
+    if granularity == 'day':
+        return (end - start).days + 1
+    if granularity == 'week':
+        monday = lambda day: day - datetime.timedelta(days=day.weekday())
+        return (monday(end) - monday(start)).days // 7 + 1
+    return (end.year - start.year) * 12 + end.month - start.month + 1
+
+
+def _timeseries_buckets(granularity, start, end):
+    """Every bucket start date between start and end, so empty periods show as zero."""
+    if granularity == 'week':
+        current = start - datetime.timedelta(days=start.weekday())
+    elif granularity == 'month':
+        current = start.replace(day=1)
+    else:
+        current = start
+    buckets = []
+    while current <= end:
+        buckets.append(current)
+        if granularity == 'day':
+            current += datetime.timedelta(days=1)
+        elif granularity == 'week':
+            current += datetime.timedelta(weeks=1)
+        else:
+            current = (current.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+    return buckets
+
+
+def _timeseries(granularity, start, end):
+    """Intake, completion and revenue series — one grouped query per metric."""
+    trunc = TIMESERIES_TRUNC[granularity]
+    tz = timezone.get_current_timezone()
+    start_dt = timezone.make_aware(datetime.datetime.combine(start, datetime.time.min), tz)
+    end_dt = timezone.make_aware(datetime.datetime.combine(end + datetime.timedelta(days=1), datetime.time.min), tz)
+
+    intake = (
+        GadgetRepairTransaction.objects
+        .filter(brought_in_date__gte=start_dt, brought_in_date__lt=end_dt)
+        .annotate(bucket=trunc('brought_in_date', output_field=DateField()))
+        .order_by().values('bucket').annotate(n=Count('id'))
+    )
+    completions = (
+        GadgetRepairTransaction.objects
+        .filter(status=GadgetRepairTransaction.COMPLETED, completed_at__gte=start_dt, completed_at__lt=end_dt)
+        .annotate(bucket=trunc('completed_at', output_field=DateField()))
+        .order_by().values('bucket').annotate(n=Count('id'))
+    )
+    # Revenue = payments received for completed repairs, as on the dashboards
+    revenue = (
+        Payment.objects
+        .filter(transaction__status=GadgetRepairTransaction.COMPLETED,
+                created_at__gte=start_dt, created_at__lt=end_dt)
+        .annotate(bucket=trunc('created_at', output_field=DateField()))
+        .order_by().values('bucket', 'payment_type').annotate(total=Sum('amount'))
+    )
+
+    buckets = _timeseries_buckets(granularity, start, end)
+    index = {bucket: i for i, bucket in enumerate(buckets)}
+    intake_series = [0] * len(buckets)
+    completion_series = [0] * len(buckets)
+    revenue_series = {'total': [0.0] * len(buckets)}
+    for payment_type, _label in Payment.PAYMENT_TYPE_CHOICES:
+        revenue_series[payment_type] = [0.0] * len(buckets)
+
+    for row in intake:
+        intake_series[index[row['bucket']]] = row['n']
+    for row in completions:
+        completion_series[index[row['bucket']]] = row['n']
+    for row in revenue:
+        i = index[row['bucket']]
+        amount = float(row['total'])
+        revenue_series.setdefault(row['payment_type'], [0.0] * len(buckets))[i] += amount
+        revenue_series['total'][i] += amount
+
+    return {
+        'granularity': granularity,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'buckets': [bucket.isoformat() for bucket in buckets],
+        'series': {
+            'intake': intake_series,
+            'completions': completion_series,
+            'revenue': {key: [round(v, 2) for v in values] for key, values in revenue_series.items()},
+        },
+    }
+
+
+@login_required
+@use_replica
+def analytics_timeseries(request):
+    """
+    JSON time series for charts.
+    ?granularity=day|week|month&start=YYYY-MM-DD&end=YYYY-MM-DD
+    (defaults: day, the last 90 days).
+    """
+    if not request.user.is_superuser and not request.user.is_staff:
+        return JsonResponse({'error': 'You do not have permission to access this data'}, status=403)
+
+    today = timezone.localdate()
+    granularity = request.GET.get('granularity', 'day')
+    if granularity not in TIMESERIES_TRUNC:
+        return JsonResponse({'error': 'granularity must be one of: day, week, month'}, status=400)
+    try:
+        end = datetime.date.fromisoformat(request.GET.get('end') or today.isoformat())
+        start = datetime.date.fromisoformat(
+            request.GET.get('start') or (end - datetime.timedelta(days=89)).isoformat()
+        )
+    except ValueError:
+        return JsonResponse({'error': 'start and end must be dates in YYYY-MM-DD format'}, status=400)
+    # The upper bound also keeps end + 1 day (and the last month bucket) representable
+    if start > end or start.year < 2000 or end.year > today.year + 1:
+        return JsonResponse({'error': 'Invalid date range'}, status=400)
+    if _timeseries_bucket_count(granularity, start, end) > TIMESERIES_MAX_BUCKETS[granularity]:
+        return JsonResponse({
+            'error': f'At most {TIMESERIES_MAX_BUCKETS[granularity]} {granularity}s per request; '
+                     'narrow the range or use a coarser granularity',
+        }, status=400)
+
+    data = cached_widget(
+        'analytics_timeseries', ['gadgetrepairtransaction', 'payment'],
+        lambda: _timeseries(granularity, start, end),
+        granularity, start, end,
+    )
+    return JsonResponse(data)
+
+
+# ============================================
+# PUBLIC REPAIR STATUS LOOKUP (no login)
+# ============================================
+
+# How many trailing phone digits the customer types to prove it's their repair
+STATUS_PHONE_DIGITS = 4
+
+STATUS_LOOKUP_FIELDS = (
+    'code', 'status', 'brought_in_date', 'completed_at', 'logs_total', 'payments_total',
+    'gadget__gadget_brand', 'gadget__gadget_model', 'gadget__customer__phone_number',
+)
+
+
+def _public_repair_status(code):
+    """What the status page shows for ``code`` (live or archived), or None — one query per tier."""
+    code = code.strip().upper()
+    row = (
+        GadgetRepairTransaction.objects.with_balances().filter(code=code)
+        .values(*STATUS_LOOKUP_FIELDS).first()
+    )
+    if row is None:
+        row = ArchivedRepairTransaction.objects.filter(code=code).values(*STATUS_LOOKUP_FIELDS).first()
+    if row is None:
+        return None
+    priced = row['logs_total'] is not None
+    return {
+        'code': row['code'],
+        'status': row['status'],
+        'device': ' '.join(filter(None, [row['gadget__gadget_brand'], row['gadget__gadget_model']])),
+        'brought_in': row['brought_in_date'],
+        'completed_at': row['completed_at'],
+        'ready': row['status'] == GadgetRepairTransaction.COMPLETED,
+        'priced': priced,
+        'total_cost': row['logs_total'],
+        'amount_paid': row['payments_total'],
+        'amount_due': max(row['logs_total'] - row['payments_total'], 0) if priced else None,
+        # Kept in the cache entry only, never rendered
+        'phone_tail': normalize_number(row['gadget__customer__phone_number'], STATUS_PHONE_DIGITS),
+    }
+
+
+def _client_ip(request):
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _repair_status_lookup(request):
+    """
+    Shared by the page and the JSON endpoint. Returns a dict with the HTTP
+    status, an error message or the repair entry, and Retry-After for 429s.
+    A wrong code and a wrong phone give the same answer, so codes can't be probed.
+    """
+    code = request.GET.get('code', '').strip()
+    phone = normalize_number(request.GET.get('phone', ''), STATUS_PHONE_DIGITS)
+    if not code:
+        return {'status': 200, 'error': None, 'repair': None}
+
+    limit, window = getattr(settings, 'REPAIR_STATUS_RATE_LIMIT', (30, 60))
+    if rate_limited('status_ip', _client_ip(request), limit, window):
+        return {'status': 429, 'error': 'Too many lookups. Please wait a minute and try again.',
+                'repair': None, 'retry_after': window}
+    if len(phone) != STATUS_PHONE_DIGITS:
+        return {'status': 400, 'repair': None,
+                'error': f'Enter the last {STATUS_PHONE_DIGITS} digits of the phone number on the repair.'}
+
+    # A locked code refuses every guess, right or wrong, until its window ends
+    limit, window = getattr(settings, 'REPAIR_STATUS_FAILURE_LIMIT', (10, 15 * 60))
+    locked = {'status': 429, 'error': 'Too many failed attempts for this code. Please try again later.',
+              'repair': None, 'retry_after': window}
+    if rate_limit_reached('status_code', code.upper(), limit, window):
+        return locked
+
+    entry = cached_repair_status(code, _public_repair_status)
+    if entry and entry['phone_tail'] and hmac.compare_digest(entry['phone_tail'], phone):
+        repair = {key: value for key, value in entry.items() if key != 'phone_tail'}
+        return {'status': 200, 'error': None, 'repair': repair}
+
+    if rate_limited('status_code', code.upper(), limit, window):
+        return locked
+    return {'status': 404, 'error': 'No repair matches that code and phone number.', 'repair': None}
+
+
+def _no_store(response, result):
+    # Personal data on a public URL: keep it out of shared and browser caches
+    patch_cache_control(response, private=True, no_store=True)
+    if 'retry_after' in result:
+        response['Retry-After'] = str(result['retry_after'])
+    return response
+
+
+def repair_status(request):
+    """Public "is my device ready?" page: ?code=<repair code>&phone=<last digits>."""
+    result = _repair_status_lookup(request)
+    response = render(request, 'repair_shop/repairs/repair_status.html', {
+        'code': request.GET.get('code', '').strip(),
+        'error': result['error'],
+        'repair': result['repair'],
+        'phone_digits': STATUS_PHONE_DIGITS,
+    }, status=result['status'])
+    return _no_store(response, result)
+
+
+def repair_status_json(request):
+    """JSON twin of repair_status for kiosks and messaging integrations."""
+    result = _repair_status_lookup(request)
+    if result['error'] is None and result['repair'] is None:
+        result = {'status': 400, 'error': 'code is required', 'repair': None}
+    payload = {'error': result['error']} if result['error'] else result['repair']
+    return _no_store(JsonResponse(payload, status=result['status']), result)
+
+
+# ============================================
+# JSON API VIEWS (read-only)
+# ============================================
+
+def api_list(request, resource):
+    """
+    One cursor-paginated page of a resource as JSON (see api.py).
+    ?fields=a,b&limit=N&cursor=TOKEN plus the list view's filters.
+    """
+    # Session, user and permissions come from the primary; only the page
+    # itself is read from the replica (see use_replica)
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    if request.method not in ('GET', 'HEAD'):
+        return JsonResponse({'error': 'This API is read-only'}, status=405)
+
+    spec = API_RESOURCES.get(resource)
+    if spec is None:
+        return JsonResponse({'error': f'Unknown resource: {resource}'}, status=404)
+    if not request.user.is_superuser and not request.user.has_perm(spec.permission):
+        return JsonResponse({'error': 'You do not have permission to access this data'}, status=403)
+
+    return _api_page(request, spec)
+
+
+@use_replica
+def _api_page(request, spec):
+    try:
+        rows, next_cursor = spec.page(request.GET)
+    except ApiError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+
+    next_url = None
+    if next_cursor is not None:
+        query = request.GET.copy()
+        query['cursor'] = next_cursor
+        next_url = f'{request.path}?{query.urlencode()}'
+    return JsonResponse({'results': rows, 'next': next_url})
+
+
 # ============================================
 # NOTIFICATION VIEWS
 # ============================================